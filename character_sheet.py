@@ -4,7 +4,7 @@ NPC 데이터를 관리합니다.
 """
 
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 import domain_manager
 
@@ -45,6 +45,37 @@ class NPCManager:
         domain_manager.update_npc(channel_id, name, npc_data)
         logging.info(f"NPC 추가/업데이트: {name}")
     
+    def add_npcs(
+        self,
+        channel_id: str,
+        entries: List[Tuple[str, str]]
+    ) -> int:
+        """
+        여러 NPC를 한 번에 추가하거나 업데이트합니다.
+        저장은 마지막에 한 번만 수행합니다.
+        
+        Args:
+            channel_id: 채널 ID
+            entries: (이름, 설명) 튜플 리스트
+        
+        Returns:
+            추가/업데이트된 NPC 수
+        """
+        npc_batch = {}
+        for name, description in entries:
+            if not name:
+                logging.warning("NPC 이름이 비어있어 추가하지 않음")
+                continue
+            npc_batch[name] = {
+                "desc": description or "설명 없음",
+                "status": DEFAULT_NPC_STATUS
+            }
+        
+        if npc_batch:
+            domain_manager.update_npcs(channel_id, npc_batch)
+            logging.info(f"NPC 일괄 추가/업데이트: {', '.join(npc_batch)}")
+        return len(npc_batch)
+    
     def update_npc_status(
         self,
         channel_id: str,
@@ -207,6 +238,11 @@ def add_npc(channel_id: str, name: str, description: str) -> None:
     npc_memory.add_npc(channel_id, name, description)
 
 
+def add_npcs(channel_id: str, entries: List[Tuple[str, str]]) -> int:
+    """여러 NPC를 한 번에 추가합니다."""
+    return npc_memory.add_npcs(channel_id, entries)
+
+
 def get_npc(channel_id: str, name: str) -> Optional[Dict[str, Any]]:
     """특정 NPC 정보를 가져옵니다."""
     return npc_memory.get_npc(channel_id, name)
@@ -5,14 +5,29 @@ Lorekeeper TRPG Bot - Domain Manager Module
 
 import os
 import json
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Optional, Dict, Any, List, Tuple, Set, Iterator
+
+# 빠른 JSON 직렬화 (선택적 의존성, 없으면 표준 json 사용)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # =========================================================
 # 상수 정의
 # =========================================================
 MAX_HISTORY_LENGTH = 40  # 히스토리 최대 보관 개수
 MAX_DESC_LENGTH = 50  # 설명 요약 시 최대 길이
+SETTINGS_CACHE_TTL = 30.0  # 비활성화/응답 모드 캐시 유효 시간 (초)
+HISTORY_FLUSH_DELAY = 2.0  # 히스토리 버퍼 저장 지연 (초, 종료 시 flush_all_history로 남은 버퍼 저장)
+HISTORY_FLUSH_SIZE = 32  # 이 개수만큼 쌓이면 즉시 저장
 
 DEFAULT_LORE = ""  # 로어는 반드시 사용자가 설정해야 함
 DEFAULT_RULES = """
@@ -132,6 +147,9 @@ def load_json(filepath: str, default_val: Any) -> Any:
         return default_val
     
     try:
+        if orjson:
+            with open(filepath, 'rb') as f:
+                return orjson.loads(f.read())
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     except json.JSONDecodeError as e:
@@ -145,6 +163,11 @@ def load_json(filepath: str, default_val: Any) -> Any:
 def save_json(filepath: str, data: Any) -> bool:
     """JSON 파일을 저장합니다."""
     try:
+        if orjson:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            with open(filepath, 'wb') as f:
+                f.write(payload)
+            return True
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         return True
@@ -153,21 +176,51 @@ def save_json(filepath: str, data: Any) -> bool:
         return False
 
 
+# 텍스트 파일 캐시 (경로 -> (수정 시각 ns, 크기, 내용, 해시)) - 로어/룰은 크고 매 턴 읽지만 거의 바뀌지 않음
+_text_cache: Dict[str, Tuple[int, int, str, str]] = {}
+
+
+def text_digest(text: str) -> str:
+    """텍스트의 내용 해시(blake2b 128비트)를 반환합니다."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
 def load_text(filepath: str, default_val: str) -> str:
-    """텍스트 파일을 로드합니다."""
-    if not os.path.exists(filepath):
+    """텍스트 파일을 로드합니다 (수정 시각과 크기가 같으면 캐시된 내용 사용)."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        _text_cache.pop(filepath, None)
         return default_val
     
+    cached = _text_cache.get(filepath)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
+            text = f.read()
     except Exception as e:
         logging.error(f"텍스트 로드 실패 {filepath}: {e}")
         return default_val
+    
+    # 해시는 내용이 바뀌어 다시 읽을 때만 계산 (캐시 키 등에서 매 턴 재계산하지 않도록)
+    _text_cache[filepath] = (st.st_mtime_ns, st.st_size, text, text_digest(text))
+    return text
+
+
+def load_text_hash(filepath: str, default_val: str) -> str:
+    """텍스트 파일 내용의 해시를 반환합니다 (파일이 없으면 기본값의 해시)."""
+    text = load_text(filepath, default_val)
+    cached = _text_cache.get(filepath)
+    if cached and cached[2] is text:
+        return cached[3]
+    return text_digest(text)
 
 
 def save_text(filepath: str, text: str) -> bool:
     """텍스트 파일을 저장합니다."""
+    _text_cache.pop(filepath, None)
     try:
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(text)
@@ -242,12 +295,100 @@ def get_domain(channel_id: str) -> Dict[str, Any]:
             if ws_key not in data["world_state"]:
                 data["world_state"][ws_key] = ws_default
     
+    # 아직 저장되지 않은 히스토리 버퍼 반영
+    pending = _pending_history.get(channel_id)
+    if pending:
+        data["history"].extend(pending)
+        if len(data["history"]) > MAX_HISTORY_LENGTH:
+            data["history"] = data["history"][-MAX_HISTORY_LENGTH:]
+    
+    # 방금 읽은 값으로 설정 캐시 갱신 (활성 채널은 설정 확인을 위해 따로 다시 읽지 않음)
+    _cache_settings(channel_id, data)
     return data
 
 
 def save_domain(channel_id: str, data: Dict[str, Any]) -> bool:
-    """채널의 도메인 데이터를 저장합니다."""
-    return save_json(get_session_file_path(channel_id), data)
+    """채널의 도메인 데이터를 저장합니다 (대기 중인 히스토리 버퍼도 함께 저장)."""
+    pending = _pending_history.get(channel_id)
+    if pending:
+        # 버퍼 반영 전에 로드된 데이터라면 누락된 항목을 덧붙임 (항목 객체 동일성으로 판별)
+        included = {id(h) for h in data["history"]}
+        missing = [h for h in pending if id(h) not in included]
+        if missing:
+            data["history"].extend(missing)
+            if len(data["history"]) > MAX_HISTORY_LENGTH:
+                data["history"] = data["history"][-MAX_HISTORY_LENGTH:]
+    
+    saved = save_json(get_session_file_path(channel_id), data)
+    if saved:
+        _cache_settings(channel_id, data)
+        if _session_channels is not None:
+            _session_channels.add(channel_id)
+        if pending:
+            _clear_pending_history(channel_id)
+    return saved
+
+
+@contextmanager
+def transaction(channel_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    도메인 데이터를 한 번 로드해 여러 변경을 모은 뒤 블록 종료 시 한 번만 저장합니다.
+    
+    블록 안에서 예외가 발생하면 저장하지 않습니다.
+    
+    Example:
+        with domain_manager.transaction(channel_id) as d:
+            d["participants"][uid]["status"] = "active"
+    """
+    d = get_domain(channel_id)
+    yield d
+    save_domain(channel_id, d)
+
+
+# 세션 파일이 존재하는 채널 ID 집합 (최초 조회 시 디렉토리에서 로드)
+_session_channels: Optional[Set[str]] = None
+
+
+def has_session(channel_id: str) -> bool:
+    """
+    채널에 저장된 세션이 있는지 확인합니다.
+    
+    메시지마다 파일 시스템을 조회하지 않도록 메모리 집합으로 판단합니다.
+    """
+    global _session_channels
+    if _session_channels is None:
+        try:
+            names = os.listdir(SESSIONS_DIR)
+        except OSError:
+            names = []
+        _session_channels = {name[:-5] for name in names if name.endswith(".json")}
+    return channel_id in _session_channels
+
+
+# =========================================================
+# 설정 캐시 (매 메시지마다 확인하는 값)
+# =========================================================
+# channel_id -> (disabled, response_mode, 만료 시각)
+_settings_cache: Dict[str, Tuple[bool, str, float]] = {}
+
+
+def _cache_settings(channel_id: str, data: Dict[str, Any]) -> Tuple[bool, str, float]:
+    """도메인 데이터에서 자주 확인하는 설정값을 캐시에 기록합니다."""
+    entry = (
+        data.get("disabled", False),
+        data.get("settings", {}).get("response_mode", "auto"),
+        time.monotonic() + SETTINGS_CACHE_TTL
+    )
+    _settings_cache[channel_id] = entry
+    return entry
+
+
+def _get_cached_settings(channel_id: str) -> Tuple[bool, str, float]:
+    """캐시된 설정값을 반환하며, 없거나 만료되었으면 디스크에서 다시 읽습니다."""
+    entry = _settings_cache.get(channel_id)
+    if entry is None or entry[2] < time.monotonic():
+        entry = _cache_settings(channel_id, get_domain(channel_id))
+    return entry
 
 
 # =========================================================
@@ -296,7 +437,7 @@ def _create_default_participant(display_name: str) -> Dict[str, Any]:
     }
 
 
-def update_participant(channel_id: str, user, reset: bool = False) -> bool:
+def update_participant(channel_id: str, user, reset: bool = False) -> Optional[Dict[str, Any]]:
     """
     참가자를 등록하거나 업데이트합니다.
     
@@ -306,7 +447,7 @@ def update_participant(channel_id: str, user, reset: bool = False) -> bool:
         reset: True면 기존 데이터를 초기화
     
     Returns:
-        성공 여부
+        최신 도메인 데이터 (호출자가 다시 로드하지 않도록 반환)
     """
     d = get_domain(channel_id)
     uid = str(user.id)
@@ -314,6 +455,11 @@ def update_participant(channel_id: str, user, reset: bool = False) -> bool:
     if reset or uid not in d["participants"]:
         d["participants"][uid] = _create_default_participant(user.display_name)
     else:
+        # 이미 활성 상태이고 마이그레이션할 필드도 없으면 (매 메시지의 일반적인 경우) 저장 생략
+        p = d["participants"][uid]
+        if p.get("status") == "active" and "ai_memory" in p and "economy" in p:
+            return d
+        
         # 기존 참가자는 상태만 활성화
         d["participants"][uid]["status"] = "active"
         
@@ -341,7 +487,26 @@ def update_participant(channel_id: str, user, reset: bool = False) -> bool:
             }
     
     save_domain(channel_id, d)
-    return True
+    return d
+
+
+def get_message_gate_state(
+    channel_id: str,
+    user_id: str
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool, bool]:
+    """
+    메시지 처리 전에 확인하는 채널 상태를 한 번의 로드로 반환합니다.
+    
+    Returns:
+        Tuple: (도메인 데이터, 참가자 데이터 또는 None, 세션 잠금 여부, 준비 여부)
+    """
+    d = get_domain(channel_id)
+    return (
+        d,
+        d["participants"].get(str(user_id)),
+        d["settings"].get("session_locked", False),
+        d.get("prepared", False)
+    )
 
 
 def get_participant_data(channel_id: str, user_id: str) -> Optional[Dict[str, Any]]:
@@ -396,6 +561,11 @@ def get_lore(channel_id: str) -> str:
     return load_text(get_lore_file_path(channel_id), DEFAULT_LORE)
 
 
+def get_lore_hash(channel_id: str) -> str:
+    """로어 내용의 해시를 가져옵니다."""
+    return load_text_hash(get_lore_file_path(channel_id), DEFAULT_LORE)
+
+
 def append_lore(channel_id: str, text: str) -> None:
     """로어를 추가합니다."""
     current = get_lore(channel_id)
@@ -403,6 +573,21 @@ def append_lore(channel_id: str, text: str) -> None:
     save_text(get_lore_file_path(channel_id), new_text)
 
 
+def store_lore(channel_id: str, text: str, replace: bool = False) -> str:
+    """
+    로어를 저장하고 저장된 전체 로어를 반환합니다.
+    
+    파일 읽기/쓰기만 하므로 이벤트 루프 밖(asyncio.to_thread)에서 호출할 수 있습니다.
+    
+    Args:
+        replace: True면 기존 로어와 요약본을 지우고 새로 저장 (파일 업로드)
+    """
+    if replace:
+        reset_lore(channel_id)
+    append_lore(channel_id, text)
+    return get_lore(channel_id)
+
+
 def reset_lore(channel_id: str) -> None:
     """로어와 요약본을 초기화합니다."""
     lore_path = get_lore_file_path(channel_id)
@@ -416,11 +601,15 @@ def reset_lore(channel_id: str) -> None:
 
 def get_lore_summary(channel_id: str) -> Optional[str]:
     """요약된 로어를 가져옵니다."""
-    path = get_lore_summary_file_path(channel_id)
-    if os.path.exists(path):
-        content = load_text(path, "")
-        return content if content else None
-    return None
+    content = load_text(get_lore_summary_file_path(channel_id), "")
+    return content if content else None
+
+
+def get_lore_summary_hash(channel_id: str) -> Optional[str]:
+    """요약된 로어의 해시를 가져옵니다 (요약이 없으면 None)."""
+    if not get_lore_summary(channel_id):
+        return None
+    return load_text_hash(get_lore_summary_file_path(channel_id), "")
 
 
 def save_lore_summary(channel_id: str, summary_text: str) -> None:
@@ -440,6 +629,11 @@ def get_rules(channel_id: str) -> str:
     return load_text(get_rules_file_path(channel_id), DEFAULT_RULES)
 
 
+def get_rules_hash(channel_id: str) -> str:
+    """룰 내용의 해시를 가져옵니다."""
+    return load_text_hash(get_rules_file_path(channel_id), DEFAULT_RULES)
+
+
 def get_rules_mode(channel_id: str) -> str:
     """
     현재 룰 모드를 반환합니다.
@@ -557,7 +751,7 @@ def set_custom_tone(channel_id: str, tone: Optional[str]) -> None:
 # =========================================================
 def is_bot_disabled(channel_id: str) -> bool:
     """봇이 비활성화되었는지 확인합니다."""
-    return get_domain(channel_id).get("disabled", False)
+    return _get_cached_settings(channel_id)[0]
 
 
 def set_bot_disabled(channel_id: str, disabled: bool) -> None:
@@ -581,7 +775,7 @@ def set_prepared(channel_id: str, prepared: bool) -> None:
 
 def get_response_mode(channel_id: str) -> str:
     """응답 모드를 가져옵니다 (auto/manual)."""
-    return get_domain(channel_id)["settings"].get("response_mode", "auto")
+    return _get_cached_settings(channel_id)[1]
 
 
 def set_response_mode(channel_id: str, mode: str) -> None:
@@ -657,6 +851,33 @@ def set_current_risk(channel_id: str, risk: str) -> None:
     save_domain(channel_id, d)
 
 
+def update_scene_state(
+    channel_id: str,
+    location: Optional[str] = None,
+    risk: Optional[str] = None
+) -> bool:
+    """
+    현재 위치/위험도를 한 번의 로드로 갱신합니다 (좌뇌 분석 결과 반영용).
+    
+    대부분의 턴은 같은 장소에 머무르므로 값이 바뀌었을 때만 저장합니다.
+    
+    Returns:
+        저장 여부
+    """
+    d = get_domain(channel_id)
+    world = d["world_state"]
+    changed = False
+    if location and world.get("current_location") != location:
+        world["current_location"] = location
+        changed = True
+    if risk and world.get("risk_level") != risk:
+        world["risk_level"] = risk
+        changed = True
+    if changed:
+        save_domain(channel_id, d)
+    return changed
+
+
 def set_location_rules(channel_id: str, rules: Dict[str, Any]) -> None:
     """위치별 규칙을 설정합니다."""
     d = get_domain(channel_id)
@@ -667,16 +888,108 @@ def set_location_rules(channel_id: str, rules: Dict[str, Any]) -> None:
 # =========================================================
 # 히스토리 관리
 # =========================================================
+# channel_id -> 미리 포맷된 "role: content" 줄 (history와 1:1 대응)
+_history_lines: Dict[str, deque] = {}
+
+# channel_id -> 아직 디스크에 쓰지 않은 히스토리 항목 / 지연 저장 타이머
+_pending_history: Dict[str, List[Dict[str, str]]] = {}
+_history_flush_timers: Dict[str, asyncio.TimerHandle] = {}
+
+
+def _format_history_line(entry: Dict[str, Any]) -> str:
+    return f"{entry['role']}: {entry['content']}"
+
+
+def _clear_pending_history(channel_id: str) -> None:
+    """히스토리 버퍼와 지연 저장 타이머를 정리합니다."""
+    _pending_history.pop(channel_id, None)
+    timer = _history_flush_timers.pop(channel_id, None)
+    if timer:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # 워커 스레드에서 저장된 경우: 타이머는 루프 스레드에서만 취소할 수 있으므로 두고,
+            # 만료 시 버퍼가 비어 있으면 flush_history가 아무것도 하지 않음
+            return
+        timer.cancel()
+
+
 def append_history(channel_id: str, role: str, content: str) -> None:
-    """대화 히스토리에 항목을 추가합니다."""
-    d = get_domain(channel_id)
-    d["history"].append({"role": role, "content": content})
+    """
+    대화 히스토리에 항목을 추가합니다.
     
-    # 최대 길이 초과 시 오래된 항목 제거
-    if len(d["history"]) > MAX_HISTORY_LENGTH:
-        d["history"] = d["history"][-MAX_HISTORY_LENGTH:]
+    매번 세션 파일을 다시 쓰지 않도록 버퍼에 모았다가 HISTORY_FLUSH_DELAY 후
+    (또는 HISTORY_FLUSH_SIZE개가 쌓이면 즉시) 한 번에 저장합니다.
+    버퍼는 get_domain/save_domain에 반영되므로 읽기 결과는 즉시 갱신됩니다.
+    """
+    entry = {"role": role, "content": content}
+    pending = _pending_history.setdefault(channel_id, [])
+    pending.append(entry)
+    
+    # 포맷된 줄 캐시도 같은 창으로 갱신
+    lines = _history_lines.get(channel_id)
+    if lines is not None:
+        lines.append(_format_history_line(entry))
+        while len(lines) > MAX_HISTORY_LENGTH:
+            lines.popleft()
+    
+    if len(pending) >= HISTORY_FLUSH_SIZE:
+        flush_history(channel_id)
+        return
     
-    save_domain(channel_id, d)
+    if channel_id not in _history_flush_timers:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(스크립트 등)에서는 바로 저장
+            flush_history(channel_id)
+            return
+        _history_flush_timers[channel_id] = loop.call_later(
+            HISTORY_FLUSH_DELAY, flush_history, channel_id
+        )
+
+
+def flush_history(channel_id: str) -> None:
+    """대기 중인 히스토리 버퍼를 세션 파일에 저장합니다."""
+    timer = _history_flush_timers.pop(channel_id, None)
+    if timer:
+        timer.cancel()
+    
+    if _pending_history.get(channel_id):
+        # get_domain이 버퍼를 합쳐서 로드하고, save_domain이 저장 후 버퍼를 비움
+        save_domain(channel_id, get_domain(channel_id))
+
+
+def flush_all_history() -> None:
+    """모든 채널의 대기 중인 히스토리 버퍼를 저장합니다 (봇 종료 시 호출)."""
+    for channel_id in list(_pending_history):
+        flush_history(channel_id)
+
+
+def get_history_text(
+    channel_id: str,
+    limit: int,
+    history: Optional[List[Dict[str, Any]]] = None
+) -> str:
+    """
+    최근 limit개의 히스토리를 "role: content" 줄 단위 텍스트로 반환합니다.
+    
+    append_history가 포맷된 줄을 누적해 두므로 매 턴 전체를 다시 포맷하지 않습니다.
+    발효 등으로 history가 외부에서 바뀌면 길이/마지막 줄 비교로 감지해 다시 만듭니다.
+    """
+    if history is None:
+        history = get_domain(channel_id)["history"]
+    
+    lines = _history_lines.get(channel_id)
+    if (
+        lines is None
+        or len(lines) != len(history)
+        or (history and lines[-1] != _format_history_line(history[-1]))
+    ):
+        lines = deque(_format_history_line(h) for h in history)
+        _history_lines[channel_id] = lines
+    
+    return "\n".join(islice(lines, max(len(lines) - limit, 0), None))
 
 
 # =========================================================
@@ -697,6 +1010,12 @@ def reset_domain(channel_id: str) -> None:
                 os.remove(filepath)
             except Exception as e:
                 logging.error(f"파일 삭제 실패 {filepath}: {e}")
+    
+    _settings_cache.pop(channel_id, None)
+    _history_lines.pop(channel_id, None)
+    _clear_pending_history(channel_id)
+    if _session_channels is not None:
+        _session_channels.discard(channel_id)
 
 
 # =========================================================
@@ -714,6 +1033,15 @@ def update_npc(channel_id: str, name: str, data: Dict[str, Any]) -> None:
     save_domain(channel_id, d)
 
 
+def update_npcs(channel_id: str, npcs: Dict[str, Dict[str, Any]]) -> None:
+    """여러 NPC 정보를 한 번에 업데이트합니다 (저장 1회)."""
+    if not npcs:
+        return
+    d = get_domain(channel_id)
+    d["npcs"].update(npcs)
+    save_domain(channel_id, d)
+
+
 # =========================================================
 # 퀘스트 보드 관리
 # =========================================================
@@ -761,14 +1089,16 @@ def set_user_description(channel_id: str, uid: str, desc: str) -> None:
 # =========================================================
 # 파티 상태 컨텍스트
 # =========================================================
-def get_party_status_context(channel_id: str) -> str:
+def get_party_status_context(channel_id: str, domain_data: Optional[Dict[str, Any]] = None) -> str:
     """
     현재 참가자들의 상세 상태를 요약하여 반환합니다.
     AI에게 컨텍스트로 제공됩니다.
     다중 플레이어를 명확하게 구분합니다.
     서사 중심 - 패시브/칭호, 관계, 상태이상 중심
+    
+    domain_data가 주어지면 다시 로드하지 않고 사용합니다.
     """
-    d = get_domain(channel_id)
+    d = domain_data if domain_data is not None else get_domain(channel_id)
     participants = d.get("participants", {})
     
     if not participants:
@@ -1176,7 +1506,6 @@ def update_session_ai_memory(channel_id: str, updates: Dict[str, Any]) -> None:
             # 그 외는 덮어쓰기
             d["ai_session_memory"][key] = value
     
-    import time
     d["ai_session_memory"]["last_updated"] = time.strftime('%Y-%m-%d %H:%M')
     save_domain(channel_id, d)
 
@@ -1185,49 +1514,54 @@ def get_full_ai_context(channel_id: str, user_id: str) -> str:
     """
     AI에게 전달할 통합 컨텍스트를 생성합니다.
     세션 메모리 + 플레이어 메모리 결합
+    
+    매 AI 응답마다 호출되므로 도메인은 한 번만 로드하고, 줄을 모아 한 번에 합칩니다.
     """
-    result = ""
+    d = get_domain(channel_id)
+    lines = []
     
-    # 1. 세션 레벨 메모리
-    session_mem = get_session_ai_memory(channel_id)
+    # 1. 세션 레벨 메모리 (조회 전용이므로 누락 시 기본값 저장 없이 빈 값으로 처리)
+    session_mem = d.get("ai_session_memory") or {}
     
     if session_mem.get("world_summary"):
-        result += f"**세계 상황:** {session_mem['world_summary']}\n"
+        lines.append(f"**세계 상황:** {session_mem['world_summary']}")
     
     if session_mem.get("current_arc"):
-        result += f"**현재 스토리:** {session_mem['current_arc']}\n"
+        lines.append(f"**현재 스토리:** {session_mem['current_arc']}")
     
     if session_mem.get("active_threads"):
-        result += f"**진행 중 이야기:** {', '.join(session_mem['active_threads'][:5])}\n"
+        lines.append(f"**진행 중 이야기:** {', '.join(session_mem['active_threads'][:5])}")
     
     if session_mem.get("foreshadowing"):
-        result += f"**미해결 복선:** {', '.join(session_mem['foreshadowing'][:3])}\n"
+        lines.append(f"**미해결 복선:** {', '.join(session_mem['foreshadowing'][:3])}")
     
     if session_mem.get("npc_summaries"):
-        npc_str = ", ".join([f"{k}({v})" for k, v in list(session_mem['npc_summaries'].items())[:5]])
-        result += f"**주요 NPC:** {npc_str}\n"
+        npc_str = ", ".join([f"{k}({v})" for k, v in islice(session_mem['npc_summaries'].items(), 5)])
+        lines.append(f"**주요 NPC:** {npc_str}")
     
     # 2. 플레이어 레벨 메모리
-    player_mem = get_ai_memory(channel_id, user_id)
+    p_data = d["participants"].get(str(user_id))
+    player_mem = p_data.get("ai_memory", {}) if p_data else {}
     if player_mem:
         if player_mem.get("relationships"):
             rel_str = ", ".join([f"{k}({v})" for k, v in player_mem["relationships"].items()])
-            result += f"**관계:** {rel_str}\n"
+            lines.append(f"**관계:** {rel_str}")
         
         if player_mem.get("passives"):
-            result += f"**패시브:** {', '.join(player_mem['passives'])}\n"
+            lines.append(f"**패시브:** {', '.join(player_mem['passives'])}")
         
         if player_mem.get("known_info"):
-            result += f"**알고 있는 정보:** {', '.join(player_mem['known_info'][:5])}\n"
+            lines.append(f"**알고 있는 정보:** {', '.join(player_mem['known_info'][:5])}")
         
         if player_mem.get("normalization"):
             norm_str = ", ".join([f"{k}={v}" for k, v in player_mem["normalization"].items()])
-            result += f"**비일상 적응:** {norm_str}\n"
+            lines.append(f"**비일상 적응:** {norm_str}")
     
-    if not result:
+    if not lines:
         return ""
     
-    return "### [AI MEMORY CONTEXT]\n" + result + "\n"
+    lines.append("")
+    return "### [AI MEMORY CONTEXT]\n" + "\n".join(lines) + "\n"
 
 
 def get_integrated_status(channel_id: str, user_id: str) -> str:
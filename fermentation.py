@@ -23,6 +23,7 @@
 """
 
 import json
+import time
 import logging
 import asyncio
 from typing import Dict, Any, List, Optional, Tuple
@@ -882,9 +883,10 @@ def ensure_memory_fields(session_data: Dict[str, Any]) -> Dict[str, Any]:
 # =========================================================
 
 # 캐싱 상수
-CACHE_MIN_TOKENS = 32768  # Gemini 최소 캐싱 토큰
+CACHE_MIN_TOKENS = 4096  # Gemini 명시적 캐싱 최소 토큰
 CACHE_DEFAULT_TTL_MINUTES = 60  # 기본 TTL (1시간)
 CACHE_SESSION_TTL_MINUTES = 180  # 세션용 TTL (3시간)
+CACHE_EXPIRY_MARGIN_SECONDS = 60  # 만료 직전 캐시는 재생성 (요청 중 만료 방지)
 
 # 채널별 캐시 저장소 (메모리)
 _channel_caches: Dict[str, Dict[str, Any]] = {}
@@ -897,10 +899,13 @@ def estimate_content_tokens(content: str) -> int:
     return int(len(content) / CHARS_PER_TOKEN)
 
 
-def should_use_caching(lore_text: str, deep_memory: str = "") -> bool:
-    """캐싱을 사용해야 하는지 판단합니다."""
-    total_content = lore_text + (deep_memory or "")
-    estimated_tokens = estimate_content_tokens(total_content)
+def should_use_caching(lore_text: str, deep_memory: str = "", rule_text: str = "") -> bool:
+    """캐싱을 사용해야 하는지 판단합니다 (캐시될 로어+룰+DEEP 메모리 기준)."""
+    estimated_tokens = (
+        estimate_content_tokens(lore_text)
+        + estimate_content_tokens(rule_text)
+        + estimate_content_tokens(deep_memory)
+    )
     
     logger.debug(f"[Caching] 추정 토큰: {estimated_tokens} (최소: {CACHE_MIN_TOKENS})")
     
@@ -915,7 +920,7 @@ async def create_context_cache(
     rule_text: str = "",
     deep_memory: str = "",
     system_instruction: str = "",
-    ttl_minutes: int = CACHE_SESSION_TTL_MINUTES
+    ttl_minutes: int = CACHE_DEFAULT_TTL_MINUTES
 ) -> Optional[str]:
     """
     컨텍스트 캐시를 생성합니다.
@@ -925,15 +930,25 @@ async def create_context_cache(
     if not client:
         return None
     
-    if not should_use_caching(lore_text, deep_memory):
+    if not should_use_caching(lore_text, deep_memory, rule_text):
         logger.info(f"[Caching] 토큰 부족으로 캐싱 스킵 - {channel_id}")
         return None
     
     try:
-        # 캐시할 컨텐츠 구성 (프리셋 순서 1-6)
-        cache_content = f"""
-{system_instruction}
-
+        from datetime import timedelta
+        ttl = timedelta(minutes=ttl_minutes)
+        
+        if system_instruction:
+            # 시스템 프롬프트(프리셋 1-6)에 로어/룰/DEEP 메모리가 이미 포함되어 있으므로
+            # 같은 내용을 contents로 한 번 더 캐싱하지 않음 (캐시 토큰 중복 방지)
+            cache_config = types.CreateCachedContentConfig(
+                display_name=f"lorekeeper-{channel_id}",
+                system_instruction=system_instruction,
+                ttl=ttl
+            )
+        else:
+            # 캐시할 컨텐츠 구성 (프리셋 순서 1-6)
+            cache_content = f"""
 <Fermented>
 ### Deep Memory (초장기 기억)
 {deep_memory if deep_memory else "(No deep memory yet)"}
@@ -949,15 +964,8 @@ async def create_context_cache(
 
 ==========CACHE BOUNDARY==========
 """
-        
-        from datetime import timedelta
-        ttl = timedelta(minutes=ttl_minutes)
-        
-        cache = client.caches.create(
-            model=model_id,
-            config=types.CreateCachedContentConfig(
+            cache_config = types.CreateCachedContentConfig(
                 display_name=f"lorekeeper-{channel_id}",
-                system_instruction=system_instruction,
                 contents=[
                     types.Content(
                         role="user",
@@ -966,13 +974,25 @@ async def create_context_cache(
                 ],
                 ttl=ttl
             )
-        )
+        
+        cache = await client.aio.caches.create(model=model_id, config=cache_config)
+        
+        # 교체된 이전 캐시는 서버 측 TTL까지 남지 않도록 삭제
+        previous_name = get_cached_content_name(channel_id)
+        if previous_name and previous_name != cache.name:
+            try:
+                await client.aio.caches.delete(name=previous_name)
+                logger.info(f"[Caching] 이전 캐시 삭제 - {channel_id}: {previous_name}")
+            except Exception as de:
+                logger.warning(f"[Caching] 이전 캐시 삭제 실패 (무시됨) - {channel_id}: {de}")
         
         _channel_caches[channel_id] = {
             "cache_name": cache.name,
             "created_at": get_timestamp(),
             "ttl_minutes": ttl_minutes,
+            "expires_at": time.monotonic() + ttl_minutes * 60 - CACHE_EXPIRY_MARGIN_SECONDS,
             "lore_hash": hash(lore_text),
+            "rule_hash": hash(rule_text or ""),
             "deep_hash": hash(deep_memory or "")
         }
         
@@ -995,13 +1015,19 @@ def get_cached_content_name(channel_id: str) -> Optional[str]:
 def is_cache_valid(
     channel_id: str, 
     lore_text: str, 
-    deep_memory: str = ""
+    deep_memory: str = "",
+    rule_text: str = ""
 ) -> bool:
     """캐시가 유효한지 확인합니다."""
     cache_info = _channel_caches.get(channel_id)
     if not cache_info:
         return False
     
+    # 서버 측 TTL이 지난 캐시를 참조하면 요청이 실패하므로 만료 전에 재생성
+    if cache_info.get("expires_at", 0) <= time.monotonic():
+        logger.info(f"[Caching] 캐시 만료 - {channel_id}")
+        return False
+    
     current_lore_hash = hash(lore_text)
     current_deep_hash = hash(deep_memory or "")
     
@@ -1013,6 +1039,10 @@ def is_cache_valid(
         logger.info(f"[Caching] DEEP 메모리 변경 감지 - {channel_id}")
         return False
     
+    if cache_info.get("rule_hash") != hash(rule_text or ""):
+        logger.info(f"[Caching] 룰 변경 감지 - {channel_id}")
+        return False
+    
     return True
 
 
@@ -1032,7 +1062,7 @@ async def delete_context_cache(client, channel_id: str) -> bool:
         return False
     
     try:
-        client.caches.delete(name=cache_name)
+        await client.aio.caches.delete(name=cache_name)
         invalidate_cache(channel_id)
         logger.info(f"[Caching] 캐시 삭제 완료 - {channel_id}")
         return True
@@ -1067,7 +1097,7 @@ async def get_or_create_cache(
     system_instruction: str = ""
 ) -> Optional[str]:
     """캐시를 가져오거나 없으면 생성합니다."""
-    if is_cache_valid(channel_id, lore_text, deep_memory):
+    if is_cache_valid(channel_id, lore_text, deep_memory, rule_text):
         cache_name = get_cached_content_name(channel_id)
         if cache_name:
             logger.debug(f"[Caching] 기존 캐시 사용 - {channel_id}")
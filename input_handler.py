@@ -12,6 +12,104 @@ from typing import Optional, Dict, Any, Tuple, List
 # =========================================================
 MAX_DICE_COUNT = 100  # 최대 주사위 개수
 MAX_DICE_SIDES = 1000  # 최대 주사위 면 수
+DICE_ADVANTAGE_MODES = frozenset({'adv', 'dis'})  # 두 번 굴려 선택하는 모드 (유리함/불리함)
+
+# 제거할 디스코드 마크다운 기호 (긴 기호부터 순서대로 제거)
+MARKDOWN_TOKENS = ('***', '**', '___', '__', '~~', '||', '`')
+
+# 대화문으로 판단하는 시작 문자
+DIALOGUE_PREFIXES = ('"', "'")
+
+# 주사위 식: 숫자d숫자(+/-숫자)
+DICE_PATTERN = re.compile(r"(\d+)d(\d+)([+-]\d+)?")
+
+# 메시지 내 (OOC: 내용) 패턴
+OOC_PATTERN = re.compile(r'\((?:OOC|ooc)[:\s]+(.+?)\)', re.IGNORECASE | re.DOTALL)
+
+# 명령어 별칭 -> 시스템 키워드 매핑 (한국어 별칭 포함)
+COMMAND_ALIASES = {
+    # === 세션 및 준비 ===
+    '준비': 'ready',
+    'ready': 'ready',
+    '리셋': 'reset',
+    '초기화': 'reset',
+    'reset': 'reset',
+    '시작': 'start',
+    'start': 'start',
+    '잠금해제': 'unlock',
+    'unlock': 'unlock',
+    '잠금': 'lock',
+    'lock': 'lock',
+    
+    # === 진행 및 모드 ===
+    '진행': 'next',
+    '건너뛰기': 'next',
+    'next': 'next',
+    '턴': 'turn',
+    'turn': 'turn',
+    '모드': 'mode',
+    'mode': 'mode',
+    
+    # === 참가자 관리 ===
+    '가면': 'mask',
+    'mask': 'mask',
+    '설명': 'desc',
+    'desc': 'desc',
+    '정보': 'info',
+    '내정보': 'info',
+    'info': 'info',
+    '잠수': 'afk',
+    'afk': 'afk',
+    '이탈': 'leave',
+    '퇴장': 'leave',
+    'leave': 'leave',
+    '복귀': 'back',
+    '컴백': 'back',
+    'back': 'back',
+    
+    # === 세계관 설정 ===
+    '로어': 'lore',
+    'lore': 'lore',
+    '룰': 'rule',
+    'rule': 'rule',
+    
+    # === 퀘스트/메모 (직접 추가용) ===
+    '퀘스트': 'quest',
+    'quest': 'quest',
+    '메모': 'memo',
+    'memo': 'memo',
+    '연대기': 'lores',
+    'lores': 'lores',
+    
+    # === NPC 정보 ===
+    'npc': 'npc',
+    'npc정보': 'npc',
+    '엔피씨': 'npc',
+    
+    # === AI 분석 도구 ===
+    '분석': 'analyze',
+    'analyze': 'analyze',
+    '일관성': 'consistency',
+    'consistency': 'consistency',
+    '세계규칙': 'worldrules',
+    'worldrules': 'worldrules',
+    '예측': 'forecast',
+    'forecast': 'forecast',
+    '둠': 'doom',
+    'doom': 'doom',
+    
+    # === 주사위 ===
+    '주사위': 'roll',
+    '굴림': 'roll',
+    'r': 'roll',
+    'roll': 'roll',
+    
+    # === 도움말 ===
+    '도움': 'help',
+    '도움말': 'help',
+    'help': 'help',
+    '명령어': 'help',
+}
 
 
 def strip_discord_markdown(text: str) -> str:
@@ -19,11 +117,10 @@ def strip_discord_markdown(text: str) -> str:
     if not text:
         return ""
     
-    patterns = [r'\*\*\*', r'\*\*', r'___', r'__', r'~~', r'\|\|', r'`']
+    # 고정 문자열 제거이므로 정규식 대신 str.replace 사용 (같은 순서로 적용)
     clean_text = text
-    
-    for p in patterns:
-        clean_text = re.sub(p, '', clean_text)
+    for token in MARKDOWN_TOKENS:
+        clean_text = clean_text.replace(token, '')
     
     return clean_text.strip()
 
@@ -31,7 +128,7 @@ def strip_discord_markdown(text: str) -> str:
 def analyze_style(text: str, clean_text: str) -> str:
     """사용자의 입력 스타일(대화/행동/설명)을 분석합니다."""
     # 대화문 감지 (따옴표로 시작)
-    if clean_text.startswith('"') or clean_text.startswith('"') or clean_text.startswith("'"):
+    if clean_text.startswith(DIALOGUE_PREFIXES):
         return "Dialogue"
     
     # 행동 감지 (별표로 감싸짐)
@@ -54,7 +151,7 @@ def roll_dice(dice_str: str, mode: str = "normal") -> Optional[Tuple[int, Any, i
         Tuple[최종값, 굴림결과, 수정치, 상세설명] 또는 None (파싱 실패 시)
     """
     # 정규식: 숫자d숫자(+/-숫자)
-    match = re.search(r"(\d+)d(\d+)([+-]\d+)?", dice_str.lower())
+    match = DICE_PATTERN.search(dice_str.lower())
     if not match:
         return None
     
@@ -75,7 +172,7 @@ def roll_dice(dice_str: str, mode: str = "normal") -> Optional[Tuple[int, Any, i
         return sum(rolls), rolls
     
     # 유리함/불리함 처리 (D&D 5e 방식: 2번 굴려서 선택)
-    if mode in ['adv', 'dis']:
+    if mode in DICE_ADVANTAGE_MODES:
         val1, rolls1 = _roll_once()
         val2, rolls2 = _roll_once()
         
@@ -120,94 +217,8 @@ def parse_input(content: str) -> Optional[Dict[str, Any]]:
         command = parts[0].lower()
         args = parts[1] if len(parts) > 1 else ""
         
-        # 시스템 명령어 매핑 사전 (한국어 별칭 포함)
-        mapping = {
-            # === 세션 및 준비 ===
-            '준비': 'ready',
-            'ready': 'ready',
-            '리셋': 'reset',
-            '초기화': 'reset',
-            'reset': 'reset',
-            '시작': 'start',
-            'start': 'start',
-            '잠금해제': 'unlock',
-            'unlock': 'unlock',
-            '잠금': 'lock',
-            'lock': 'lock',
-            
-            # === 진행 및 모드 ===
-            '진행': 'next',
-            '건너뛰기': 'next',
-            'next': 'next',
-            '턴': 'turn',
-            'turn': 'turn',
-            '모드': 'mode',
-            'mode': 'mode',
-            
-            # === 참가자 관리 ===
-            '가면': 'mask',
-            'mask': 'mask',
-            '설명': 'desc',
-            'desc': 'desc',
-            '정보': 'info',
-            '내정보': 'info',
-            'info': 'info',
-            '잠수': 'afk',
-            'afk': 'afk',
-            '이탈': 'leave',
-            '퇴장': 'leave',
-            'leave': 'leave',
-            '복귀': 'back',
-            '컴백': 'back',
-            'back': 'back',
-            
-            # === 세계관 설정 ===
-            '로어': 'lore',
-            'lore': 'lore',
-            '룰': 'rule',
-            'rule': 'rule',
-            
-            # === 퀘스트/메모 (직접 추가용) ===
-            '퀘스트': 'quest',
-            'quest': 'quest',
-            '메모': 'memo',
-            'memo': 'memo',
-            '연대기': 'lores',
-            'lores': 'lores',
-            
-            # === NPC 정보 ===
-            'npc': 'npc',
-            'npc정보': 'npc',
-            '엔피씨': 'npc',
-            
-            # === AI 분석 도구 ===
-            '분석': 'analyze',
-            'analyze': 'analyze',
-            '일관성': 'consistency',
-            'consistency': 'consistency',
-            '세계규칙': 'worldrules',
-            'worldrules': 'worldrules',
-            '예측': 'forecast',
-            'forecast': 'forecast',
-            '둠': 'doom',
-            'doom': 'doom',
-            
-            # === 주사위 ===
-            '주사위': 'roll',
-            '굴림': 'roll',
-            'r': 'roll',
-            'roll': 'roll',
-            
-            # === 도움말 ===
-            '도움': 'help',
-            '도움말': 'help',
-            'help': 'help',
-            '명령어': 'help',
-        }
-        
-        # 매핑 확인
-        if command in mapping:
-            command = mapping[command]
+        # 매핑 확인 (별칭이 아니면 그대로 사용)
+        command = COMMAND_ALIASES.get(command, command)
         
         # 주사위 특수 처리 (!r, !주사위 등)
         if command == 'roll':
@@ -255,13 +266,12 @@ def parse_input(content: str) -> Optional[Dict[str, Any]]:
     
     # 2. OOC 감지 - 메시지 내 (OOC: 내용) 패턴 추출
     # 메시지 어디에든 (OOC: ...) 가 있으면 추출
-    ooc_pattern = r'\((?:OOC|ooc)[:\s]+(.+?)\)'
-    ooc_match = re.search(ooc_pattern, clean_content, re.IGNORECASE | re.DOTALL)
+    ooc_match = OOC_PATTERN.search(clean_content)
     
     if ooc_match:
         ooc_content = ooc_match.group(1).strip()
         # OOC 부분을 제거한 나머지 텍스트
-        remaining_text = re.sub(ooc_pattern, '', clean_content, flags=re.IGNORECASE | re.DOTALL).strip()
+        remaining_text = OOC_PATTERN.sub('', clean_content).strip()
         
         if remaining_text:
             # OOC + 행동/대사가 함께 있음 → 둘 다 처리
@@ -10,17 +10,170 @@ import logging
 import io
 import re
 import json
-from typing import Optional, Tuple, List
+import tempfile
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, Tuple, List, Dict, Any, Set, Iterator
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
+# 빠른 JSON 파싱 (선택적 의존성, 없으면 표준 json 사용)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 빠른 이벤트 루프 (선택적 의존성, Windows 등 미지원 환경에서는 기본 asyncio 루프 사용)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # =========================================================
 # 상수 정의
 # =========================================================
 MAX_DISCORD_MESSAGE_LENGTH = 2000
 SUPPORTED_TEXT_EXTENSIONS = ['.txt', '.md', '.json', '.log', '.py', '.yaml', '.yml']
 VERSION = "3.1"
+STATUS_EDIT_INTERVAL = 1.0  # 상태 메시지 편집 최소 간격 (초)
+STREAM_PREVIEW_LENGTH = 1900  # 스트리밍 중 로딩 메시지에 보여줄 최대 글자 수 (끝부분)
+MESSAGE_CHUNK_DELAY = 0.25  # 분할 전송 시 메시지 사이 대기 시간 (초, 채널 레이트 리밋 회피)
+SENTENCE_BREAKS = (". ", "? ", "! ", "… ", "。")  # 줄바꿈이 없을 때 메시지를 나눌 문장 경계
+NVC_SKIP_MAX_LENGTH = 4  # 이 글자 수 이하의 플레이어 입력은 좌뇌 분석 생략
+MAX_CONCURRENT_MESSAGES = 8  # 동시에 처리할 최대 메시지 수 (채널 전체 합산)
+CHAT_BATCH_DELAY = 0.6  # 연속 채팅 병합 대기 시간 (초)
+CHAT_BATCH_LONG_DELAY = 2.0  # 마지막 조각이 분할된 긴 메시지일 때 대기 시간 (초)
+CHAT_BATCH_LONG_THRESHOLD = 1900  # 이 길이 이상이면 Discord 2000자 분할로 간주
+ATTACHMENT_CACHE_MAX_ENTRIES = 32  # 첨부파일 텍스트 캐시 최대 항목 수
+ATTACHMENT_CACHE_MAX_BYTES = 1_000_000  # 캐시 대상 첨부파일 최대 크기 (바이트)
+PAYLOAD_SPOOL_THRESHOLD = 1_000_000  # 이 글자 수 이상이면 임시 파일로 전송
+PAYLOAD_SPOOL_MAX_MEMORY = 5_000_000  # 임시 파일이 디스크로 넘어가기 전 메모리 한도 (바이트)
+
+# 도움말 메시지
+HELP_MESSAGE = (
+    "📚 **Lorekeeper 명령어 목록**\n\n"
+    
+    "**━━━ 🎭 캐릭터 ━━━**\n"
+    "`!가면 [이름]` - 캐릭터 이름 설정\n"
+    "`!설명 [내용]` - 캐릭터 설명 설정\n"
+    "`!정보` - 캐릭터 정보 조회\n"
+    "  ↳ `!정보 캐릭터` `관계` `패시브` `세계`\n\n"
+    
+    "**━━━ 📜 세션 ━━━**\n"
+    "`!준비` - 세션 준비 상태 확인\n"
+    "`!시작` - 세션 시작\n"
+    "`!진행` - 기록된 행동 종합 후 다음 장면\n"
+    "`!리셋` - 세션 초기화\n\n"
+    
+    "**━━━ 🌍 세계관 ━━━**\n"
+    "`!로어 [파일]` - 세계관 설정\n"
+    "`!룰 [내용]` - 룰 추가 (기본룰 자동 적용)\n"
+    "`!퀘스트 [내용]` - 퀘스트 추가/조회\n"
+    "`!메모 [내용]` - 메모 추가/조회\n"
+    "`!연대기` - 연대기 조회\n"
+    "`!연대기 생성` - AI가 스토리 요약\n"
+    "`!연대기 추출` - 대화 로그 파일 저장 (증분)\n\n"
+    
+    "**━━━ 🎲 기타 ━━━**\n"
+    "`!r [주사위]` - 선택적 주사위 (예: !r 1d20, !r 1d100)\n"
+    "  └ 높을수록 좋은 결과, AI가 서사적으로 해석\n"
+    "`!npc [이름]` - NPC 정보 조회\n"
+    "`!분석 [질문]` - AI OOC 분석\n\n"
+    
+    "**━━━ ✏️ OOC 수정 ━━━**\n"
+    "`(OOC: 요청 내용)` - 캐릭터 정보 수정\n"
+    "예: `(OOC: 리엘이랑 친해진 걸로)`\n\n"
+    
+    "**━━━ 📖 성장 시스템 ━━━**\n"
+    "레벨/경험치 대신 **패시브/칭호**로 성장!\n"
+    "• 패시브: 반복 경험으로 습득 (독 내성, 야간 시야... )\n"
+    "• 칭호: 특별한 업적으로 획득 (드래곤 슬레이어...)\n"
+    "• 적응: 비일상에 노출될수록 익숙해짐\n\n"
+    
+    "**━━━ ⚖️ 판정 시스템 ━━━**\n"
+    "기본:  AI가 패시브/칭호/상황으로 판정\n"
+    "선택: 주사위 결과를 AI가 참고하여 해석"
+)
+
+# 대용량 로어 처리 단계 표시명
+LORE_STAGE_NAMES = {
+    "splitting": "📂 청크 분할",
+    "compressing": "🗜️ 청크 압축",
+    "merging": "🔗 중간 병합",
+    "finalizing": "✨ 최종 통합"
+}
+
+# 비참가자가 사용 가능한 명령어
+ENTRY_COMMANDS = frozenset({
+    'ready', 'reset', 'start', 'mask', 'lore', 'rule', 'system'
+})
+
+# 준비되지 않은 세션에서 허용되는 명령어
+ALLOWED_BEFORE_READY = frozenset({'ready', 'lore', 'rule', 'reset', 'system'})
+
+# OOC 수정 필드별 이모지
+OOC_FIELD_EMOJI = {
+    "relationships": "💞", "passives": "🏆", "known_info": "💡",
+    "foreshadowing": "🔮", "normalization": "🌓", "appearance": "👁️",
+    "personality": "💭", "background": "📖", "notes": "📋",
+    "inventory": "🎒", "economy": "💰", "status_effects": "💫"
+}
+
+# OOC 수정 시 참가자 데이터로 반영되는 필드
+OOC_PARTICIPANT_FIELDS = ("economy", "inventory", "status_effects")
+
+# NPC 태도별 말투 힌트 (우뇌 프롬프트용)
+NPC_SPEECH_HINTS = {
+    "hostile": "위협적, 조롱, 정보 숨김",
+    "unfriendly": "퉁명스럽고 짧음, 비협조",
+    "neutral": "정중하고 사무적",
+    "friendly": "따뜻하고 친근, 정보 제공",
+    "devoted": "존경/애정, 비밀 공유 가능"
+}
+NPC_ATTITUDE_LINE = "- **{}**: {} ({}) → 말투: {}"
+
+# 우뇌 프롬프트 템플릿 ([10] Current Context / [11] 유저 메시지, [12] 출력 지시는 persona 시스템 프롬프트)
+CURRENT_CONTEXT_TEMPLATE = "<Current-Context>\n{}\n</Current-Context>\n\n"
+USER_MESSAGE_TEMPLATE = (
+    "<User_Message>\n"
+    "### Material (플레이어 입력)\n"
+    "<material>\n{}\n</material>\n"
+    "</User_Message>"
+)
+
+# 우뇌 응답의 ```system_update {...}``` 블록 (JSON 캡처, 매치 구간은 출력에서 제거)
+SYSTEM_UPDATE_PATTERN = re.compile(r'```system_update\s*\n?\s*(\{.*?\})\s*\n?```', re.DOTALL)
+
+# 룰 모드 표시명
+RULES_MODE_DISPLAY = {
+    "default": "📗 기본 룰",
+    "hybrid": "📘 기본 룰 + 커스텀",
+    "custom": "📙 완전 커스텀"
+}
+
+# !정보 서브 명령어 별칭 매핑 (읽기 전용)
+INFO_SUB_ALIASES = MappingProxyType({
+    '캐릭터': 'character', 'char': 'character', 'character': 'character', 'c': 'character',
+    '관계': 'relation', 'rel': 'relation', 'relation': 'relation', 'r': 'relation',
+    '패시브': 'passive', 'passive': 'passive', 'p': 'passive', '칭호': 'passive',
+    '세계': 'world', 'world': 'world', 'w': 'world', '월드': 'world',
+})
+
+# 정보 서브타입 -> 표시할 섹션 집합
+INFO_SECTIONS = MappingProxyType({
+    'all': frozenset({'character', 'relation', 'passive', 'world'}),
+    'character': frozenset({'character'}),
+    'relation': frozenset({'relation'}),
+    'passive': frozenset({'passive'}),
+    'world': frozenset({'world'}),
+})
+
+# 파싱 전에 원문 그대로 처리하는 봇 On/Off 토글: 명령어 -> (비활성화 여부, 응답)
+BOT_TOGGLE_COMMANDS = MappingProxyType({
+    "!off": (True, "🔇 Off"),
+    "!on": (False, "🔊 On"),
+})
 
 # =========================================================
 # 모듈 임포트
@@ -76,27 +229,131 @@ except Exception as e:
 # =========================================================
 # Discord 클라이언트 초기화
 # =========================================================
-intents = discord.Intents. default()
+# 실제로 처리하는 이벤트(서버/DM 메시지, !리셋 확인 리액션)만 구독 - 프레즌스/멤버 등 불필요한 게이트웨이 이벤트 차단
+intents = discord.Intents.none()
+intents.guilds = True
+intents.guild_messages = True
+intents.guild_reactions = True
+intents.dm_messages = True
 intents.message_content = True
-client_discord = discord.Client(intents=intents)
+# 멤버/메시지 캐시는 사용하지 않음 (작성자는 메시지 객체에서, 편집 대상은 전송 결과에서 직접 얻고,
+# 리셋 확인은 캐시가 필요 없는 raw_reaction_add로 받음)
+client_discord = discord.Client(
+    intents=intents,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None
+)
+
+# 메시지 처리 동시성 제한 (전체 슬롯 + 채널별 순서 보장)
+_message_semaphore = asyncio.Semaphore(MAX_CONCURRENT_MESSAGES)
+_channel_message_locks: Dict[str, asyncio.Lock] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+# 연속 채팅 병합 버퍼 ((channel_id, author_id) -> 대기 중인 메시지/타이머)
+_pending_chats: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+# 백그라운드 발효가 진행 중인 채널 (중복 발효 방지)
+_fermenting_channels: Set[str] = set()
+
+# !off가 수신되어 진행 중인 스트리밍 응답을 중단해야 하는 채널 (토글 처리 시 해제)
+_stream_abort_channels: Set[str] = set()
+
+# 첨부파일 텍스트 LRU 캐시 ((url, size) -> 디코딩된 텍스트)
+_attachment_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+# 채널별 우뇌 기본 세션 (channel_id -> (입력 서명, 히스토리 주입 전 세션))
+_base_sessions: Dict[str, Tuple[Tuple, Any]] = {}
+
+# OOC 수정 필드 조합 -> 이모지 문자열 캐시
+_ooc_fields_str_cache: Dict[Tuple[str, ...], str] = {}
 
 
 # =========================================================
 # 유틸리티 함수
 # =========================================================
-async def send_long_message(channel, text:  str) -> None:
-    """2000자가 넘는 메시지를 나누어 전송하는 함수"""
+async def send_long_message(channel, text:  str) -> Optional[discord.Message]:
+    """
+    2000자가 넘는 메시지를 나누어 전송하는 함수
+    
+    Discord에서 순서가 보장되도록 조각은 하나씩 순서대로 전송합니다.
+    
+    Returns:
+        마지막으로 전송된 메시지 (text가 비어 있으면 None)
+    """
     if not text:
-        return
+        return None
     
     if len(text) <= MAX_DISCORD_MESSAGE_LENGTH:
-        await channel.send(text)
-        return
+        return await channel.send(text)
+    
+    # 메시지 분할 전송 (문단 경계 우선, 조각은 필요할 때 하나씩 생성)
+    last_message = None
+    for chunk in split_message(text):
+        if last_message is not None:
+            await asyncio.sleep(MESSAGE_CHUNK_DELAY)
+        last_message = await channel.send(chunk)
+    return last_message
+
+
+def split_message(text: str, limit: int = MAX_DISCORD_MESSAGE_LENGTH) -> Iterator[str]:
+    """
+    텍스트를 limit 이하 조각으로 나누어 순서대로 생성합니다.
+    
+    문단(빈 줄) → 줄바꿈 → 문장 끝 → 공백 순으로 경계를 찾고, 없으면 글자 수로 자릅니다.
+    조각이 지나치게 짧아지지 않도록 경계는 limit의 절반 이후에서만 찾습니다.
+    """
+    start, length = 0, len(text)
+    while length - start > limit:
+        end = start + limit
+        min_cut = start + limit // 2
+        cut = text.rfind("\n\n", min_cut, end)
+        if cut < 0:
+            cut = text.rfind("\n", min_cut, end)
+        if cut < 0:
+            # 문장 부호까지 포함해서 자름
+            cut = max(text.rfind(mark, min_cut, end) for mark in SENTENCE_BREAKS)
+            if cut >= 0:
+                cut += 1
+        if cut < 0:
+            cut = text.rfind(" ", min_cut, end)
+        if cut < 0:
+            cut = end
+        piece = text[start:cut].rstrip()
+        if piece:
+            yield piece
+        
+        # 경계의 줄바꿈/공백은 다음 조각 앞에서 제거
+        start = cut
+        while start < length and text[start] in " \n":
+            start += 1
+    
+    if start < length:
+        yield text[start:]
+
+
+async def read_attachment_cached(attachment) -> str:
+    """
+    첨부파일을 UTF-8 텍스트로 읽어옵니다 (LRU 캐시 사용).
+    
+    Raises:
+        UnicodeDecodeError: UTF-8 디코딩 실패 시
+    """
+    key = (attachment.url, attachment.size)
+    cached = _attachment_cache.get(key)
+    if cached is not None:
+        _attachment_cache.move_to_end(key)
+        return cached
+    
+    data = await attachment.read()
+    text = data.decode('utf-8')
     
-    # 메시지 분할 전송
-    for i in range(0, len(text), MAX_DISCORD_MESSAGE_LENGTH):
-        chunk = text[i:i + MAX_DISCORD_MESSAGE_LENGTH]
-        await channel.send(chunk)
+    if len(data) <= ATTACHMENT_CACHE_MAX_BYTES:
+        _attachment_cache[key] = text
+        if len(_attachment_cache) > ATTACHMENT_CACHE_MAX_ENTRIES:
+            _attachment_cache.popitem(last=False)
+    
+    return text
 
 
 async def read_attachment_text(attachment) -> Tuple[Optional[str], Optional[str]]: 
@@ -113,8 +370,7 @@ async def read_attachment_text(attachment) -> Tuple[Optional[str], Optional[str]
         return None, f"⚠️ **지원하지 않는 파일입니다.**\n지원 확장자: {', '.join(SUPPORTED_TEXT_EXTENSIONS)}"
     
     try:
-        data = await attachment.read()
-        text = data.decode('utf-8')
+        text = await read_attachment_cached(attachment)
         return text, None
     except UnicodeDecodeError:
         return None, f"⚠️ 파일 `{attachment.filename}` 읽기 실패:  UTF-8 인코딩이 아닙니다."
@@ -122,6 +378,27 @@ async def read_attachment_text(attachment) -> Tuple[Optional[str], Optional[str]
         return None, f"⚠️ 파일 `{attachment.filename}` 읽기 실패: {e}"
 
 
+def make_payload_file(parts: List[str], filename: str) -> discord.File:
+    """
+    텍스트 조각들을 UTF-8로 인코딩하여 전송용 파일 객체를 만듭니다.
+    
+    작은 페이로드는 메모리(BytesIO)에, 큰 페이로드는 일정 크기 이상부터
+    디스크로 넘어가는 임시 파일에 기록합니다.
+    """
+    total_length = sum(len(part) for part in parts)
+    
+    if total_length < PAYLOAD_SPOOL_THRESHOLD:
+        buffer = io.BytesIO()
+    else:
+        buffer = tempfile.SpooledTemporaryFile(max_size=PAYLOAD_SPOOL_MAX_MEMORY)
+    
+    for part in parts:
+        buffer.write(part.encode('utf-8'))
+    buffer.seek(0)
+    
+    return discord.File(buffer, filename=filename)
+
+
 async def safe_delete_message(message) -> None:
     """메시지를 안전하게 삭제합니다."""
     try:
@@ -134,6 +411,26 @@ async def safe_delete_message(message) -> None:
         logging.warning(f"메시지 삭제 실패: {e}")
 
 
+async def discard_sent_message(send_task: asyncio.Task) -> None:
+    """전송 태스크의 완료를 기다린 뒤 보낸 메시지를 삭제합니다 (전송 실패는 무시)."""
+    try:
+        sent = await send_task
+    except Exception as e:
+        logging.warning(f"메시지 전송 실패 (삭제 생략): {e}")
+        return
+    await safe_delete_message(sent)
+
+
+def _user_content(text: str, _content=types.Content, _part=types.Part) -> types.Content:
+    """히스토리용 user Content를 생성합니다 (기본 인자로 클래스를 지역 바인딩)."""
+    return _content(role="user", parts=[_part(text=text)])
+
+
+def _model_content(text: str, _content=types.Content, _part=types.Part) -> types.Content:
+    """히스토리용 model Content를 생성합니다 (기본 인자로 클래스를 지역 바인딩)."""
+    return _content(role="model", parts=[_part(text=text)])
+
+
 # =========================================================
 # 명령어 핸들러
 # =========================================================
@@ -177,6 +474,7 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
         
         # 장르 및 톤 정보
         genres = domain_manager.get_active_genres(channel_id)
+        genres_display = ', '.join(genres) if genres else '미분석'
         custom_tone = domain_manager.get_custom_tone(channel_id)
         
         info_msg = f"📜 **로어 정보**\n\n"
@@ -186,7 +484,7 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
             info_msg += f"**📦 요약본 크기:** {len(summary):,}자\n"
             info_msg += f"**🗜️ 압축률:** {len(raw_lore) // max(len(summary), 1)}: 1\n"
         
-        info_msg += f"\n**🎭 장르:** {', '.join(genres) if genres else '미분석'}\n"
+        info_msg += f"\n**🎭 장르:** {genres_display}\n"
         
         if custom_tone:
             info_msg += f"**🎨 톤:** {custom_tone}\n"
@@ -195,18 +493,16 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
         
         # 요약본이 있으면 파일로 첨부
         if summary: 
-            file_content = f"=== Lorekeeper 로어 요약본 ===\n"
-            file_content += f"원본:  {len(raw_lore):,}자 → 요약:  {len(summary):,}자\n"
-            file_content += f"장르: {', '.join(genres) if genres else '미분석'}\n"
-            file_content += f"{'=' * 40}\n\n"
-            file_content += summary
-            
-            file_buffer = io.BytesIO(file_content.encode('utf-8'))
-            file_buffer.seek(0)
+            header = (
+                f"=== Lorekeeper 로어 요약본 ===\n"
+                f"원본:  {len(raw_lore):,}자 → 요약:  {len(summary):,}자\n"
+                f"장르: {genres_display}\n"
+                f"{'=' * 40}\n\n"
+            )
             
             await message.channel.send(
                 "📄 **요약본 파일:**",
-                file=discord.File(file_buffer, filename="lore_summary.txt")
+                file=make_payload_file([header, summary], "lore_summary.txt")
             )
         else:
             # 요약본이 없으면 원본 미리보기
@@ -226,13 +522,10 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
     # 로어 저장
     is_append = not file_text and domain_manager.get_lore(channel_id).strip()
     
-    if file_text:
-        domain_manager.reset_lore(channel_id)  # 파일 업로드 시 기존 로어 리셋
-    
-    domain_manager.append_lore(channel_id, full)
-    
-    # 로어 크기 확인
-    raw_lore = domain_manager. get_lore(channel_id)
+    # 로어 파일은 수 MB일 수 있으므로 저장은 워커 스레드에서 (파일 업로드 시 기존 로어 리셋)
+    raw_lore = await asyncio.to_thread(
+        domain_manager.store_lore, channel_id, full, bool(file_text)
+    )
     lore_length = len(raw_lore)
     
     # 대용량 로어 여부 판단 (15000자 이상)
@@ -254,46 +547,52 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
             f"🔄 **AI 재분석 중... ** (장르, NPC, 규칙)"
         )
     
+    # 상태 메시지 편집 스로틀 (Discord 편집 레이트 리밋 회피)
+    loop = asyncio.get_running_loop()
+    last_edit = 0.0
+    
+    async def throttled_edit(content: str, force: bool = False) -> None:
+        """간격 내의 중간 진행 상황은 건너뜀 (최종 결과는 force로 항상 표시)."""
+        nonlocal last_edit
+        now = loop.time()
+        if force or now - last_edit > STATUS_EDIT_INTERVAL:
+            await status_msg.edit(content=content)
+            last_edit = now
+    
     # AI 분석
     if client_genai: 
         try:
             # 대용량 로어 처리
             if is_massive: 
                 async def progress_callback(stage, current, total):
-                    stage_names = {
-                        "splitting": "📂 청크 분할",
-                        "compressing": "🗜️ 청크 압축",
-                        "merging": "🔗 중간 병합",
-                        "finalizing": "✨ 최종 통합"
-                    }
-                    stage_name = stage_names.get(stage, stage)
-                    await status_msg.edit(
-                        content=f"📚 **[대용량 로어 처리 중]**\n"
-                                f"{stage_name}:  {current}/{total}"
+                    stage_name = LORE_STAGE_NAMES.get(stage, stage)
+                    await throttled_edit(
+                        f"📚 **[대용량 로어 처리 중]**\n"
+                        f"{stage_name}:  {current}/{total}"
                     )
                 
                 summary, metadata = await memory_system.process_massive_lore(
                     client_genai, MODEL_ID, raw_lore, progress_callback
                 )
                 
-                domain_manager.save_lore_summary(channel_id, summary)
+                await asyncio.to_thread(domain_manager.save_lore_summary, channel_id, summary)
                 
-                await status_msg.edit(
-                    content=f"📚 **[대용량 처리 완료]**\n"
-                            f"• 원본:  {metadata['original_length']:,}자\n"
-                            f"• 압축: {metadata['final_length']:,}자\n"
-                            f"• 압축률: {metadata['compression_ratio']}: 1\n"
-                            f"• 처리 시간: {metadata['processing_time']}초\n"
-                            f"• 방식: {metadata['method']}\n\n"
-                            f"⏳ 장르/NPC 분석 중..."
+                await throttled_edit(
+                    f"📚 **[대용량 처리 완료]**\n"
+                    f"• 원본:  {metadata['original_length']:,}자\n"
+                    f"• 압축: {metadata['final_length']:,}자\n"
+                    f"• 압축률: {metadata['compression_ratio']}: 1\n"
+                    f"• 처리 시간: {metadata['processing_time']}초\n"
+                    f"• 방식: {metadata['method']}\n\n"
+                    f"⏳ 장르/NPC 분석 중..."
                 )
             else:
-                await status_msg.edit(content="⏳ **[AI]** 세계관 압축 중...")
+                await throttled_edit("⏳ **[AI]** 세계관 압축 중...")
                 summary = await memory_system.compress_lore_core(client_genai, MODEL_ID, raw_lore)
-                domain_manager.save_lore_summary(channel_id, summary)
+                await asyncio.to_thread(domain_manager.save_lore_summary, channel_id, summary)
             
             # 장르 분석 (요약본 기반으로 수행 - 토큰 절약)
-            await status_msg.edit(content="⏳ **[AI]** 장르 및 NPC 데이터 추출 중...")
+            await throttled_edit("⏳ **[AI]** 장르 및 NPC 데이터 추출 중...")
             
             # 대용량일 경우 요약본으로 분석, 아니면 원본으로
             analysis_text = summary if is_massive else raw_lore
@@ -303,8 +602,10 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
             domain_manager.set_custom_tone(channel_id, res.get("custom_tone"))
             
             npcs = await memory_system.analyze_npcs_from_lore(client_genai, MODEL_ID, analysis_text)
-            for n in npcs:
-                character_sheet.npc_memory.add_npc(channel_id, n. get("name"), n.get("description"))
+            character_sheet.npc_memory.add_npcs(
+                channel_id,
+                [(n.get("name"), n.get("description")) for n in npcs if n.get("name")]
+            )
             
             rules = await memory_system.analyze_location_rules_from_lore(client_genai, MODEL_ID, analysis_text)
             if rules:
@@ -315,13 +616,13 @@ async def handle_lore_command(message, channel_id:  str, arg: str) -> None:
             if is_massive:
                 final_msg += f"\n**압축률:** {metadata['compression_ratio']}:1 ({metadata['original_length']: ,}자 → {metadata['final_length']:,}자)"
             
-            await status_msg.edit(content=final_msg)
+            await throttled_edit(final_msg, force=True)
             
         except Exception as e: 
             logging.error(f"Lore Analysis Error: {e}")
-            await status_msg.edit(content=f"⚠️ **분석 중 오류 발생:** {e}")
+            await throttled_edit(f"⚠️ **분석 중 오류 발생:** {e}", force=True)
     else:
-        await status_msg.edit(content="📜 저장 완료 (⚠️ API 키 없음:  AI 분석 건너뜀)")
+        await throttled_edit("📜 저장 완료 (⚠️ API 키 없음:  AI 분석 건너뜀)", force=True)
 
 
 async def handle_rule_command(message, channel_id: str, arg: str) -> None:
@@ -333,8 +634,7 @@ async def handle_rule_command(message, channel_id: str, arg: str) -> None:
         for att in message.attachments:
             if att.filename.lower().endswith('. txt'):
                 try:
-                    data = await att.read()
-                    file_text = data.decode('utf-8')
+                    file_text = await read_attachment_cached(att)
                     break
                 except Exception as e:
                     await message.channel.send(f"⚠️ 파일 읽기 실패: {e}")
@@ -372,15 +672,10 @@ async def handle_rule_command(message, channel_id: str, arg: str) -> None:
     
     # 룰 조회
     rules_mode = domain_manager.get_rules_mode(channel_id)
-    mode_display = {
-        "default": "📗 기본 룰",
-        "hybrid": "📘 기본 룰 + 커스텀",
-        "custom": "📙 완전 커스텀"
-    }
     
     await send_long_message(
         message. channel,
-        f"**[{mode_display. get(rules_mode, '📘')}]**\n\n{domain_manager.get_rules(channel_id)}"
+        f"**[{RULES_MODE_DISPLAY.get(rules_mode, '📘')}]**\n\n{domain_manager.get_rules(channel_id)}"
     )
 
 
@@ -409,12 +704,11 @@ async def handle_chronicle_command(message, channel_id: str, arg: str) -> None:
             await message.channel.send(msg_text)
             return
         
-        # 로어도 함께 포함
+        # 로어도 함께 포함 (중간 문자열 결합 없이 버퍼에 직접 기록)
         lore = domain_manager.get_lore(channel_id)
-        content = f"=== LORE ===\n{lore}\n\n{ch}" if lore else ch
+        parts = ["=== LORE ===\n", lore, "\n\n", ch] if lore else [ch]
         
-        with io.BytesIO(content.encode('utf-8')) as f:
-            await message.channel.send(msg_text, file=discord.File(f, filename="chronicles.txt"))
+        await message.channel.send(msg_text, file=make_payload_file(parts, "chronicles.txt"))
         return
     
     # 연대기 조회 (기본)
@@ -445,7 +739,12 @@ async def handle_npc_info_command(message, channel_id: str, npc_name: str) -> No
         await message.channel.send(f"⚠️ '{npc_name}'라는 NPC를 찾을 수 없습니다.")
 
 
-async def handle_info_command(message, channel_id: str, sub_command: str = "") -> None:
+async def handle_info_command(
+    message,
+    channel_id: str,
+    sub_command: str = "",
+    domain_data: Optional[Dict[str, Any]] = None
+) -> None:
     """
     통합 정보 명령어를 처리합니다. 
     
@@ -455,9 +754,14 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     - 관계: NPC 관계도
     - 패시브: 패시브, 칭호, 비일상 적응
     - 세계: 퀘스트, 메모, 세계상황, 복선, 아는 정보
+    
+    domain_data가 주어지면 (메시지 처리 중 이미 로드한 데이터) 다시 로드하지 않습니다.
     """
     uid = str(message.author.id)
-    p = domain_manager.get_participant_data(channel_id, uid)
+    if domain_data is not None:
+        p = domain_data["participants"].get(uid)
+    else:
+        p = domain_manager.get_participant_data(channel_id, uid)
     
     if not p:
         await message.channel.send("❌ 정보 없음.  `!가면`으로 먼저 등록하세요.")
@@ -465,37 +769,32 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     
     mask = p.get('mask', 'Unknown')
     ai_mem = p.get('ai_memory', {})
+    ai_mem_get = ai_mem.get
     sub = sub_command.strip().lower()
     
-    # 서브 명령어 별칭 매핑
-    sub_aliases = {
-        '캐릭터': 'character', 'char': 'character', 'character': 'character', 'c': 'character',
-        '관계': 'relation', 'rel': 'relation', 'relation': 'relation', 'r': 'relation',
-        '패시브': 'passive', 'passive': 'passive', 'p': 'passive', '칭호': 'passive',
-        '세계': 'world', 'world': 'world', 'w': 'world', '월드': 'world',
-    }
-    sub_type = sub_aliases.get(sub, 'all')
+    sub_type = INFO_SUB_ALIASES.get(sub, 'all')
+    sections = INFO_SECTIONS[sub_type]
     
     result = f"👤 **[{mask}]**\n\n"
     
     # =========================================================
     # 캐릭터 섹션:  외형, 성격, 배경, 소지품
     # =========================================================
-    if sub_type in ['all', 'character']:
+    if 'character' in sections:
         result += "**━━━ 🎭 캐릭터 ━━━**\n"
         
         # 외형
-        appearance = ai_mem.get('appearance', '')
+        appearance = ai_mem_get('appearance', '')
         if appearance:
             result += f"👁️ **외형:** {appearance}\n"
         
         # 성격
-        personality = ai_mem.get('personality', '')
+        personality = ai_mem_get('personality', '')
         if personality:
             result += f"💭 **성격:** {personality}\n"
         
         # 배경
-        background = ai_mem.get('background', '')
+        background = ai_mem_get('background', '')
         if background:
             result += f"📖 **배경:** {background}\n"
         
@@ -525,10 +824,10 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     # =========================================================
     # 관계 섹션: NPC 관계도
     # =========================================================
-    if sub_type in ['all', 'relation']:
+    if 'relation' in sections:
         result += "**━━━ 💞 관계 ━━━**\n"
         
-        relationships = ai_mem.get('relationships', {})
+        relationships = ai_mem_get('relationships', {})
         if relationships:
             for name, desc in relationships.items():
                 result += f"  • **{name}:** {desc}\n"
@@ -540,10 +839,10 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     # =========================================================
     # 패시브 섹션:  패시브, 칭호, 비일상 적응
     # =========================================================
-    if sub_type in ['all', 'passive']:
+    if 'passive' in sections:
         result += "**━━━ 🏆 패시브/칭호 ━━━**\n"
         
-        passives = ai_mem.get('passives', [])
+        passives = ai_mem_get('passives', [])
         if passives: 
             for p_name in passives:
                 result += f"  • {p_name}\n"
@@ -551,7 +850,7 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
             result += "_획득한 패시브/칭호가 없습니다._\n"
         
         # 비일상 적응
-        normalization = ai_mem.get('normalization', {})
+        normalization = ai_mem_get('normalization', {})
         if normalization:
             result += "\n🌓 **비일상 적응:**\n"
             for thing, status in normalization.items():
@@ -562,11 +861,17 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     # =========================================================
     # 세계 섹션: 퀘스트, 메모, 세계상황, 복선, 아는 정보
     # =========================================================
-    if sub_type in ['all', 'world']:
+    if 'world' in sections:
         result += "**━━━ 🌍 세계 ━━━**\n"
         
-        # 퀘스트
-        quests = quest_manager.get_active_quests(channel_id)
+        # 퀘스트/메모 (퀘스트 보드 한 번만 로드)
+        if domain_data is not None:
+            board = domain_data.get("quest_board") or {}
+        else:
+            board = domain_manager.get_quest_board(channel_id) or {}
+        quests = board.get("active", [])
+        memos = board.get("memos", [])
+        
         if quests:
             result += "📜 **활성 퀘스트:**\n"
             for q in quests[: 5]: 
@@ -574,8 +879,6 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
             if len(quests) > 5:
                 result += f"  _...  외 {len(quests) - 5}개_\n"
         
-        # 메모
-        memos = quest_manager.get_memos(channel_id)
         if memos:
             result += "📝 **메모:**\n"
             for m in memos[:5]:
@@ -584,21 +887,24 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
                 result += f"  _... 외 {len(memos) - 5}개_\n"
         
         # 알고 있는 정보
-        known_info = ai_mem.get('known_info', [])
+        known_info = ai_mem_get('known_info', [])
         if known_info: 
             result += "💡 **알고 있는 정보:**\n"
             for info in known_info: 
                 result += f"  • {info}\n"
         
         # 복선
-        foreshadowing = ai_mem.get('foreshadowing', [])
+        foreshadowing = ai_mem_get('foreshadowing', [])
         if foreshadowing:
             result += "🔮 **미해결 복선:**\n"
             for fs in foreshadowing: 
                 result += f"  • {fs}\n"
         
         # 세션 AI 메모리 (세계 상황)
-        session_mem = domain_manager.get_session_ai_memory(channel_id)
+        if domain_data is not None:
+            session_mem = domain_data.get("ai_session_memory") or {}
+        else:
+            session_mem = domain_manager.get_session_ai_memory(channel_id)
         if session_mem:
             current_arc = session_mem.get('current_arc', '')
             if current_arc:
@@ -614,8 +920,12 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
                 for change in world_changes[:3]:
                     result += f"  • {change}\n"
         
-        # 세계 섹션이 비어있으면
-        if not any([quests, memos, known_info, foreshadowing, session_mem. get('current_arc') if session_mem else False]):
+        # 세계 섹션이 비어있으면 (단락 평가로 리스트 생성 없이 판정)
+        world_has_content = bool(
+            quests or memos or known_info or foreshadowing
+            or (session_mem and session_mem.get('current_arc'))
+        )
+        if not world_has_content:
             result += "_아직 기록된 세계 정보가 없습니다._\n"
         
         result += "\n"
@@ -629,6 +939,173 @@ async def handle_info_command(message, channel_id: str, sub_command: str = "") -
     await send_long_message(message.channel, result)
 
 
+async def apply_ooc_edit(
+    channel_id: str,
+    uid: str,
+    ooc_content: str,
+    ai_mem: Dict[str, Any],
+    p_data: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    OOC 요청을 AI로 해석하여 AI 메모리와 참가자 데이터에 적용합니다.
+    
+    Returns:
+        Tuple[Optional[Dict], str]: (AI 수정 결과, 수정된 필드 이모지 문자열)
+        적용된 수정이 없으면 이모지 문자열은 빈 문자열입니다.
+    """
+    edit_result = await memory_system.process_ooc_memory_edit(
+        client_genai, MODEL_ID, ooc_content, ai_mem, p_data
+    )
+    
+    if not edit_result or not edit_result.get("edits"):
+        return edit_result, ""
+    
+    updated_mem, updated_participant = memory_system.apply_memory_edits(
+        ai_mem, edit_result["edits"], p_data
+    )
+    
+    # 참가자 데이터를 먼저 저장해야 p_data의 이전 ai_memory가 갱신분을 덮어쓰지 않음
+    if updated_participant:
+        for key in OOC_PARTICIPANT_FIELDS:
+            if key in updated_participant:
+                p_data[key] = updated_participant[key]
+        domain_manager.save_participant_data(channel_id, uid, p_data)
+    
+    domain_manager.update_ai_memory(channel_id, uid, updated_mem)
+    
+    # 수정 순서를 유지한 채 최상위 필드만 중복 제거
+    edited_fields = tuple(dict.fromkeys(
+        e.get("field", "").partition(".")[0] for e in edit_result["edits"]
+    ))
+    return edit_result, format_ooc_fields(edited_fields)
+
+
+def format_ooc_fields(fields: Tuple[str, ...]) -> str:
+    """수정된 필드 목록을 이모지 문자열로 변환합니다 (알려진 필드 조합은 캐시)."""
+    cached = _ooc_fields_str_cache.get(fields)
+    if cached is not None:
+        return cached
+    
+    fields_str = " ".join([OOC_FIELD_EMOJI.get(f, "📝") for f in fields])
+    # AI가 임의 필드명을 만들 수 있으므로 알려진 필드 조합만 캐시하여 크기를 제한
+    if all(f in OOC_FIELD_EMOJI for f in fields):
+        _ooc_fields_str_cache[fields] = fields_str
+    return fields_str
+
+
+def load_narrative_sources(channel_id: str) -> Tuple[str, str, str]:
+    """
+    AI 응답에 사용할 로어(요약 우선)와 룰 텍스트, 그리고 둘을 합친 해시를 로드합니다.
+    
+    해시는 파일 내용이 바뀔 때만 계산되어 캐시되므로 응답 캐시 키에 큰 본문을 매 턴 다시 넣지 않습니다.
+    """
+    summary = domain_manager.get_lore_summary(channel_id)
+    if summary:
+        lore_txt, lore_hash = summary, domain_manager.get_lore_summary_hash(channel_id)
+    else:
+        lore_txt, lore_hash = domain_manager.get_lore(channel_id), domain_manager.get_lore_hash(channel_id)
+    sources_hash = f"{lore_hash}:{domain_manager.get_rules_hash(channel_id)}"
+    return lore_txt, domain_manager.get_rules(channel_id), sources_hash
+
+
+async def prepare_narrative_session(
+    channel_id: str,
+    lore_txt: str,
+    rule_txt: str,
+    sources_hash: str,
+    active_genres: List[str],
+    custom_tone: Optional[str],
+    deep_memory: str,
+    fermented_summary_text: str,
+    history: List[Dict[str, Any]]
+) -> persona.ChatSessionAdapter:
+    """
+    우뇌 세션을 준비합니다 (캐싱 세션 우선, 실패 시 일반 세션 + 저장된 히스토리 주입).
+    
+    입력(로어/룰/장르/톤/기억)이 그대로이면 채널의 기본 세션을 재사용하고
+    저장된 히스토리만 새로 주입합니다.
+    좌뇌 분석 결과와 무관하므로 분석과 동시에 실행할 수 있습니다.
+    
+    로어/룰은 본문 대신 load_narrative_sources의 해시로 비교하여 큰 텍스트를 서명에 보관하지 않습니다.
+    """
+    signature = (
+        sources_hash, tuple(active_genres or ()), custom_tone,
+        deep_memory, fermented_summary_text
+    )
+    cached = _base_sessions.get(channel_id)
+    base = None
+    if cached and cached[0] == signature:
+        base = cached[1]
+        # 캐시 세션은 서버 측 캐시가 아직 유효할 때만 재사용
+        cache_name = base.config.cached_content
+        if cache_name and not (
+            fermentation.is_cache_valid(channel_id, lore_txt, deep_memory, rule_txt)
+            and fermentation.get_cached_content_name(channel_id) == cache_name
+        ):
+            base = None
+    
+    if base is None:
+        # 캐싱 세션 생성 시도 (프리셋 순서 적용)
+        try:
+            base, used_cache = await persona.create_cached_session(
+                client_genai, MODEL_ID, channel_id,
+                lore_txt, rule_txt,
+                active_genres, custom_tone, deep_memory,
+                fermentation_module=fermentation
+            )
+            if used_cache:
+                logging.info("[Session] 캐싱 세션 사용 - %s", channel_id)
+            _base_sessions[channel_id] = (signature, base)
+        except Exception as cache_err:
+            # 일시적 실패일 수 있으므로 일반 세션은 재사용 대상으로 저장하지 않음
+            logging.warning(f"[Session] 캐싱 실패, 일반 세션 사용:  {cache_err}")
+            base = persona.create_risu_style_session(
+                client_genai, MODEL_ID, lore_txt, rule_txt,
+                active_genres, custom_tone, deep_memory,
+                fermented_summary=fermented_summary_text,
+                character_descriptions=""
+            )
+    
+    # 기본 세션 히스토리와 저장된 히스토리(MAX_HISTORY_LENGTH로 이미 제한됨)를 한 번에 구성
+    return persona.ChatSessionAdapter(
+        client=client_genai,
+        model=MODEL_ID,
+        history=[
+            *base.history,
+            *[
+                _user_content(h['content']) if h['role'] == "User" else _model_content(h['content'])
+                for h in history
+            ]
+        ],
+        config=base.config
+    )
+
+
+def _action_npc_add(channel_id: str, content: str) -> str:
+    """NPC 추가 액션 ("이름: 설명" 또는 이름만)"""
+    name, sep, desc = content.partition(":")
+    name = name.strip() if sep else content
+    character_sheet.npc_memory.add_npc(channel_id, name, desc.strip() if sep else "Auto")
+    return f"👥 NPC: {name}"
+
+
+def _action_xp_award(channel_id: str, content: str) -> None:
+    """XP 지급 액션 (XP는 제거됨 - 성과는 패시브/칭호로 표현하므로 기록만 남김)"""
+    logging.info(f"[Achievement] {content}")
+
+
+# AI 시스템 액션 디스패치 테이블 ((tool, type) -> handler(channel_id, content))
+SYSTEM_ACTION_HANDLERS = {
+    ("Memo", "Add"): quest_manager.add_memo,
+    ("Memo", "Remove"): quest_manager.remove_memo,
+    ("Memo", "Archive"): quest_manager.resolve_memo_auto,
+    ("Quest", "Add"): quest_manager.add_quest,
+    ("Quest", "Complete"): quest_manager.complete_quest,
+    ("NPC", "Add"): _action_npc_add,
+    ("XP", "Award"): _action_xp_award,
+}
+
+
 async def process_ai_system_action(message, channel_id: str, sys_action: dict) -> Optional[str]:
     """AI가 제안한 시스템 액션을 처리합니다."""
     if not sys_action or not isinstance(sys_action, dict):
@@ -641,613 +1118,816 @@ async def process_ai_system_action(message, channel_id: str, sys_action: dict) -
     if not all([tool, atype, content]):
         return None
     
-    auto_msg = None
-    
-    if tool == "Memo":
-        if atype == "Add":
-            auto_msg = quest_manager.add_memo(channel_id, content)
-        elif atype == "Remove":
-            auto_msg = quest_manager.remove_memo(channel_id, content)
-        elif atype == "Archive":
-            auto_msg = quest_manager.resolve_memo_auto(channel_id, content)
-    
-    elif tool == "Quest":
-        if atype == "Add":
-            auto_msg = quest_manager.add_quest(channel_id, content)
-        elif atype == "Complete":
-            auto_msg = quest_manager.complete_quest(channel_id, content)
-    
-    elif tool == "NPC" and atype == "Add":
-        if ":" in content:
-            name, desc = content.split(":", 1)
-            character_sheet.npc_memory. add_npc(channel_id, name. strip(), desc.strip())
-            auto_msg = f"👥 NPC:  {name.strip()}"
-        else:
-            character_sheet.npc_memory. add_npc(channel_id, content, "Auto")
-            auto_msg = f"👥 NPC: {content}"
-    
-    # XP Award 제거됨 - 성과는 패시브/칭호로 표현
-    elif tool == "XP" and atype == "Award":
-        logging.info(f"[Achievement] {content}")
-    
-    return auto_msg
+    handler = SYSTEM_ACTION_HANDLERS.get((tool, atype))
+    if handler:
+        return handler(channel_id, content)
+    return None
 
 
 # =========================================================
-# Discord 이벤트 핸들러
+# 우뇌 SYSTEM_UPDATE 처리
+# 각 핸들러는 (p_data, ai_mem, value, update_msgs)를 받아 제자리에서 수정하고,
+# 표시할 변경 알림을 update_msgs에 추가합니다.
 # =========================================================
-@client_discord.event
-async def on_ready():
-    """봇 준비 완료 시 실행"""
-    domain_manager.initialize_folders()
-    logging.info(f"로그인 성공: {client_discord.user}")
-    print(f"--- Lorekeeper V{VERSION} Online ({client_discord.user}) ---")
-    print(f"Model: {MODEL_ID}")
+def _upd_inventory_add(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """인벤토리 추가"""
+    inventory = p_data.setdefault("inventory", {})
+    for item, amount in value.items():
+        inventory[item] = inventory.get(item, 0) + int(amount)
+        update_msgs.append(f"🎒 **+{item}**")
 
 
-@client_discord.event
-async def on_message(message):
-    """메시지 수신 시 실행"""
-    # 봇 자신의 메시지 또는 빈 메시지 무시
-    if message.author == client_discord.user or not message.content:
+def _upd_inventory_remove(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """인벤토리 제거"""
+    inventory = p_data.setdefault("inventory", {})
+    for item, amount in value.items():
+        if item in inventory:
+            remaining = inventory[item] - int(amount)
+            if remaining <= 0:
+                del inventory[item]
+            else:
+                inventory[item] = remaining
+            update_msgs.append(f"🎒 **-{item}**")
+
+
+def _upd_gold_change(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """골드 변경"""
+    economy = p_data.setdefault("economy", {"gold": 0})
+    change = int(value)
+    economy["gold"] = max(0, economy.get("gold", 0) + change)
+    if change > 0:
+        update_msgs.append(f"💰 **+{change}**")
+    elif change < 0:
+        update_msgs.append(f"💰 **{change}**")
+
+
+def _upd_status_add(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """상태이상 추가"""
+    status_effects = p_data.setdefault("status_effects", [])
+    existing = set(status_effects)
+    for status in value:
+        if status not in existing:
+            existing.add(status)
+            status_effects.append(status)
+            update_msgs.append(f"💫 **{status}**")
+
+
+def _upd_status_remove(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """상태이상 제거"""
+    status_effects = p_data.setdefault("status_effects", [])
+    for status in value:
+        if status in status_effects:
+            status_effects.remove(status)
+            update_msgs.append(f"✨ **{status} 해제**")
+
+
+def _upd_relationship(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """관계 업데이트"""
+    relationships = ai_mem.setdefault("relationships", {})
+    for npc, desc in value.items():
+        relationships[npc] = desc
+        update_msgs.append(f"💞 **{npc}**")
+
+
+def _upd_adaptation(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+    """적응도 업데이트"""
+    normalization = ai_mem.setdefault("normalization", {})
+    for element, status in value.items():
+        normalization[element] = status
+        update_msgs.append(f"🌓 **{element}**")
+
+
+def _make_memory_list_handler(field: str, note: str):
+    """AI 메모리 리스트 필드에 중복 없이 추가하는 핸들러를 만듭니다 (note의 {}는 항목명)."""
+    def handler(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+        entries = ai_mem.setdefault(field, [])
+        existing = set(entries)
+        for entry in value:
+            if entry not in existing:
+                existing.add(entry)
+                entries.append(entry)
+                update_msgs.append(note.format(entry))
+    return handler
+
+
+def _make_memory_text_handler(field: str, note: str):
+    """AI 메모리 텍스트 필드 뒤에 이어 붙이는 핸들러를 만듭니다."""
+    def handler(p_data: Dict[str, Any], ai_mem: Dict[str, Any], value: Any, update_msgs: List[str]) -> None:
+        current = ai_mem.get(field, "")
+        ai_mem[field] = f"{current} {value}" if current else value
+        update_msgs.append(note)
+    return handler
+
+
+# update_json 키 -> 핸들러
+SYSTEM_UPDATE_HANDLERS = {
+    "inventory_add": _upd_inventory_add,
+    "inventory_remove": _upd_inventory_remove,
+    "gold_change": _upd_gold_change,
+    "status_add": _upd_status_add,
+    "status_remove": _upd_status_remove,
+    "relationship_update": _upd_relationship,
+    "passive_add": _make_memory_list_handler("passives", "🏆 **{}**"),
+    "info_add": _make_memory_list_handler("known_info", "💡 **정보**"),
+    "foreshadow_add": _make_memory_list_handler("foreshadowing", "🔮 **복선**"),
+    "adaptation_update": _upd_adaptation,
+    "appearance_update": _make_memory_text_handler("appearance", "👁️ **외형 변화**"),
+    "personality_update": _make_memory_text_handler("personality", "💭 **성격 변화**"),
+    "background_update": _make_memory_text_handler("background", "📖 **배경 추가**"),
+}
+
+
+# =========================================================
+# 명령어 디스패치
+# 각 핸들러는 (message, channel_id, parsed, domain_data)를 받고,
+# AI 응답을 이어서 생성해야 하면 system_trigger 문자열을 반환합니다.
+# =========================================================
+async def _cmd_help(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!도움말: 명령어 목록을 출력합니다."""
+    await send_long_message(message.channel, HELP_MESSAGE)
+
+
+async def _cmd_reset(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!리셋: 세션을 초기화합니다."""
+    was_reset = await session_manager.manager.execute_reset(
+        message, client_discord, domain_manager, character_sheet
+    )
+    # 실제로 초기화된 채널의 세션만 해제 (취소/시간 초과 시에는 그대로 재사용)
+    if was_reset:
+        _base_sessions.pop(channel_id, None)
+
+
+async def _cmd_ready(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!준비: 세션 준비 상태를 확인합니다."""
+    await session_manager. manager.check_preparation(message, domain_manager)
+
+
+async def _cmd_start(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!시작: 세션을 시작하고 오프닝 트리거를 반환합니다."""
+    domain_manager.update_participant(channel_id, message.author)
+    if await session_manager.manager.start_session(
+        message, client_genai, MODEL_ID, domain_manager
+    ):
+        return "[System:  Generate a visceral opening scene for the campaign.]"
+    return None
+
+
+async def _cmd_unlock(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!잠금해제: 세션 잠금을 해제합니다."""
+    domain_manager.set_session_lock(channel_id, False)
+    await message.channel.send("🔓 **잠금 해제**")
+
+
+async def _cmd_lock(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!잠금: 세션을 잠급니다."""
+    domain_manager.set_session_lock(channel_id, True)
+    await message. channel.send("🔒 **세션 잠금**")
+
+
+async def _cmd_lore(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!로어: 로어 명령어를 처리합니다."""
+    await handle_lore_command(message, channel_id, parsed['content']. strip())
+
+
+async def _cmd_mode(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!모드: 응답 모드를 전환하거나 조회합니다."""
+    arg = parsed['content'].strip()
+    if '대기' in arg or '수동' in arg:
+        domain_manager.set_response_mode(channel_id, 'waiting')
+        await message.channel.send(
+            "⏸️ **대기 모드**\n"
+            "플레이어 채팅은 기록만 됩니다.  (✏️)\n"
+            "`!진행`으로 AI 응답을 받으세요."
+        )
+    elif '자동' in arg:
+        domain_manager.set_response_mode(channel_id, 'auto')
+        await message. channel.send("▶️ **자동 모드** - 매 채팅마다 AI가 응답합니다.")
+    else:
+        current = domain_manager.get_response_mode(channel_id)
+        mode_name = "대기" if current == "waiting" else "자동"
+        await message.channel.send(
+            f"⚙️ **현재 모드:** {mode_name}\n"
+            f"• `!모드 자동` - 매 채팅마다 AI 응  \n"
+            f"• `!모드 대기` - `!진행` 전까지 기록만"
+        )
+
+
+async def _cmd_next(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!진행 / !턴: 다음 장면 진행 트리거를 반환합니다."""
+    await message.add_reaction("🎬")
+    return "[System: 기록된 모든 플레이어 행동을 종합하여 다음 장면을 진행하세요.  각 캐릭터의 행동과 침묵 모두 고려하여 서사적으로 진행하세요.]"
+
+
+async def _cmd_mask(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!가면: 캐릭터 이름을 설정합니다."""
+    target = parsed['content']
+    status = domain_manager.get_participant_status(channel_id, message.author.id)
+    
+    if status == "left":
+        domain_manager.update_participant(channel_id, message.author, True)
+        await message.channel.send("🆕 환생 완료")
+    
+    domain_manager.update_participant(channel_id, message.author)
+    domain_manager.set_user_mask(channel_id, message.author.id, target)
+    await message.channel.send(f"🎭 가면:  {target}")
+
+
+async def _cmd_desc(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!설명: 캐릭터 설명을 설정합니다."""
+    domain_manager.update_participant(channel_id, message.author)
+    domain_manager.set_user_description(
+        channel_id, message. author.id, parsed['content']
+    )
+    await message. channel.send("📝 저장됨")
+
+
+async def _cmd_info(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!정보: 통합 정보를 조회합니다."""
+    sub_cmd = parsed['content'].strip()
+    await handle_info_command(message, channel_id, sub_cmd, domain_data)
+
+
+async def _cmd_quest(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!퀘스트: 퀘스트를 추가하거나 조회합니다."""
+    arg = parsed['content'].strip()
+    if not arg:
+        await send_long_message(
+            message.channel,
+            quest_manager.get_active_quests_text(channel_id)
+        )
+    else:
+        result = quest_manager.add_quest(channel_id, arg)
+        await message.channel.send(result)
+
+
+async def _cmd_memo(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!메모: 메모를 추가하거나 조회합니다."""
+    arg = parsed['content'].strip()
+    if not arg:
+        await send_long_message(
+            message.channel,
+            quest_manager.get_memos_text(channel_id)
+        )
+    else: 
+        result = quest_manager.add_memo(channel_id, arg)
+        await message.channel.send(result)
+
+
+async def _cmd_afk(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!잠수: 참가자 상태를 AFK로 변경합니다."""
+    domain_manager. set_participant_status(channel_id, message.author.id, "afk")
+    await message. channel.send("💤")
+
+
+async def _cmd_leave(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!이탈: 참가자 상태를 이탈로 변경합니다."""
+    domain_manager.set_participant_status(
+        channel_id, message. author.id, "left", "이탈"
+    )
+    await message.channel.send("🚪")
+
+
+async def _cmd_back(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!복귀: 참가자를 다시 활성화합니다."""
+    domain_manager.update_participant(channel_id, message.author)
+    await message.channel.send("✨")
+
+
+async def _cmd_rule(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!룰: 룰 명령어를 처리합니다."""
+    await handle_rule_command(message, channel_id, parsed['content']. strip())
+
+
+async def _cmd_lores(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!연대기: 연대기 명령어를 처리합니다."""
+    await handle_chronicle_command(message, channel_id, parsed['content'].strip())
+
+
+async def _cmd_npc(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!npc: NPC 정보를 조회합니다."""
+    await handle_npc_info_command(
+        message, channel_id, parsed. get('content', '').strip()
+    )
+
+
+async def _cmd_analyze(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!분석 / !ooc: AI OOC 분석을 수행합니다."""
+    question = parsed. get('content', '').strip()
+    if not question:
+        await message. channel.send(
+            "🔍 **OOC 분석 모드**\n"
+            "사용법: `!분석 [질문]` 또는 `!ooc [질문]`\n"
+            "예: `!분석 이 NPC의 동기는 뭘까?`"
+        )
         return
     
-    try:
-        channel_id = str(message.channel.id)
-        
-        # 봇 On/Off 명령어
-        if message.content == "!off":
-            domain_manager.set_bot_disabled(channel_id, True)
-            await message.channel.send("🔇 Off")
-            return
-        
-        if message.content == "!on": 
-            domain_manager.set_bot_disabled(channel_id, False)
-            await message.channel.send("🔊 On")
-            return
-        
-        # 봇이 비활성화된 경우 무시
-        if domain_manager. is_bot_disabled(channel_id):
-            return
-        
-        # 입력 파싱
-        parsed = input_handler.parse_input(message.content)
-        if not parsed:
-            return
+    if not client_genai: 
+        await message.channel. send("⚠️ AI가 연결되지 않았습니다.")
+        return
+    
+    loading = await message.channel.send("🔍 **[OOC 분석 중...]**")
+    
+    # 컨텍스트 수집 - domain_data 사용
+    lore = domain_manager.get_lore(channel_id)
+    hist_text = domain_manager.get_history_text(channel_id, 20, domain_data.get('history', []))
+    
+    # 브레인스토밍 분석 호출
+    result = await memory_system.analyze_brainstorming(
+        client_genai, MODEL_ID, hist_text, lore, question
+    )
+    
+    await safe_delete_message(loading)
+    
+    # 결과 포맷팅
+    if result. get("analysis_type") == "error":
+        await message.channel.send(f"⚠️ 분석 실패: {result.get('recommendation')}")
+    else:
+        parts = [
+            "🔍 **[OOC 분석 결과]**",
+            "",
+            f"**현재 상황:** {result.get('current_state_summary', 'N/A')}",
+            "",
+        ]
         
-        cmd = parsed. get('command')
+        if result.get('potential_paths'):
+            parts.append("**가능한 경로:**")
+            parts.extend(
+                f"{i}. {path.get('path', 'N/A')}"
+                for i, path in enumerate(result['potential_paths'][:3], 1)
+            )
         
-        # =========================================================
-        # 보안:  참가자 및 잠금 확인
-        # =========================================================
-        is_participant = domain_manager.get_participant_data(
-            channel_id, str(message.author.id)
-        ) is not None
-        domain_data = domain_manager.get_domain(channel_id)
-        is_locked = domain_data['settings']. get('session_locked', False)
-        
-        # 비참가자가 사용 가능한 명령어
-        entry_commands = [
-            'ready', 'reset', 'start', 'mask', 'lore', 'rule', 'system'
-        ]
+        if result.get('recommendation'):
+            parts.extend(("", f"**추천:** {result['recommendation']}"))
         
-        if not is_participant:
-            if is_locked:
-                return
-            if parsed['type'] == 'command': 
-                if cmd not in entry_commands:
-                    return
-            else:
-                return
+        if result.get('open_questions'):
+            parts.extend(("", "**열린 질문:**"))
+            parts.extend(f"• {q}" for q in result['open_questions'][:3])
         
-        # 준비되지 않은 세션에서 허용되는 명령어
-        if not domain_manager.is_prepared(channel_id):
-            allowed_before_ready = ['ready', 'lore', 'rule', 'reset', 'system']
-            if parsed['type'] != 'command' or cmd not in allowed_before_ready:
-                await message.channel.send("⚠️ `!준비`를 먼저 해주세요.")
-                return
+        await send_long_message(message.channel, "\n".join(parts))
+
+
+async def _cmd_consistency(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!일관성: 서사 일관성을 검사합니다."""
+    if not client_genai:
+        await message.channel.send("⚠️ AI가 연결되지 않았습니다.")
+        return
+    
+    loading = await message.channel. send("🔍 **[일관성 검사 중...]**")
+    
+    lore = domain_manager.get_lore(channel_id)
+    hist_text = domain_manager.get_history_text(channel_id, 30, domain_data.get('history', []))
+    
+    result = await memory_system.check_narrative_consistency(
+        client_genai, MODEL_ID, hist_text, lore
+    )
+    
+    await safe_delete_message(loading)
+    
+    parts = [
+        "📋 **[일관성 검사 결과]**",
+        "",
+        f"**전체 일관성:** {result.get('overall_consistency', 'Unknown')}",
+        "",
+    ]
+    
+    issues = result.get('issues', [])
+    if issues:
+        parts.append("**발견된 문제:**")
+        for issue in issues[:5]:
+            severity = "🔴" if issue.get('severity') == 'critical' else "🟡"
+            parts.append(f"{severity} [{issue.get('category')}] {issue.get('description')}")
+    else:
+        parts.append("✅ 발견된 문제 없음")
+    
+    threads = result.get('plot_threads', [])
+    if threads:
+        parts.extend(("", f"**활성 플롯 스레드:** {', '.join(threads[:5])}"))
+    
+    await send_long_message(message.channel, "\n".join(parts))
+
+
+async def _cmd_worldrules(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!세계규칙: 로어에서 세계 규칙을 추출합니다."""
+    if not client_genai:
+        await message.channel.send("⚠️ AI가 연결되지 않았습니다.")
+        return
+    
+    loading = await message. channel.send("🌍 **[세계 규칙 추출 중...]**")
+    
+    lore = domain_manager.get_lore(channel_id)
+    
+    result = await memory_system.extract_world_constraints(
+        client_genai, MODEL_ID, lore
+    )
+    
+    await safe_delete_message(loading)
+    
+    if result: 
+        parts = ["🌍 **[세계 규칙]**", ""]
         
-        system_trigger = None
+        if result.get('setting'):
+            s = result['setting']
+            parts.append(f"**배경:** {s.get('era', 'N/A')} / {s.get('location', 'N/A')}")
+        
+        if result.get('theme'):
+            t = result['theme']
+            parts.append(f"**장르:** {', '.join(t.get('genres', []))}")
+            parts.append(f"**분위기:** {t.get('tone', 'N/A')}")
+        
+        if result.get('systems'):
+            parts.extend(("", "**시스템 규칙:**"))
+            parts.extend(f"• {key}:  {val}" for key, val in result['systems'].items() if val)
+        
+        if result.get('social', {}).get('taboos'):
+            parts.extend(("", f"**금기:** {', '.join(result['social']['taboos'][:5])}"))
+        
+        await send_long_message(message.channel, "\n".join(parts))
+    else:
+        await message.channel.send("⚠️ 세계 규칙 추출 실패")
+
+
+async def _cmd_forecast(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!예측: 위기 수치 예측을 출력합니다."""
+    forecast_msg = world_manager.get_doom_forecast(channel_id)
+    await send_long_message(message.channel, forecast_msg)
+
+
+async def _cmd_doom(message, channel_id: str, parsed: Dict[str, Any], domain_data: Dict[str, Any]) -> Optional[str]:
+    """!둠: 위기 수치를 조회하거나 조절합니다."""
+    arg = parsed. get('content', '').strip()
+    if not arg:
+        status = world_manager.get_doom_status(channel_id)
+        await message.channel.send(
+            f"📊 **위기 수치:** {status['value']}% ({status['description']})\n"
+            f"{'🚨 위험!' if status['is_danger'] else '✅ 안전'}"
+        )
+        return
+    
+    try:
+        amount = int(arg)
+        result = world_manager.change_doom(channel_id, amount)
+        event = world_manager.trigger_doom_event(channel_id)
+        await send_long_message(message.channel, f"{result}\n\n{event}" if event else result)
+    except ValueError:
+        await message.channel.send("⚠️ 사용법: `!둠 [+/-숫자]` 또는 `!둠` (현재 상태)")
+
+
+# 명령어 -> 핸들러 매핑
+COMMAND_HANDLERS = {
+    'help': _cmd_help,
+    'reset': _cmd_reset,
+    'ready': _cmd_ready,
+    'start': _cmd_start,
+    'unlock': _cmd_unlock,
+    'lock': _cmd_lock,
+    'lore': _cmd_lore,
+    'mode': _cmd_mode,
+    'next': _cmd_next,
+    'turn': _cmd_next,
+    'mask': _cmd_mask,
+    'desc': _cmd_desc,
+    'info': _cmd_info,
+    'quest': _cmd_quest,
+    'memo': _cmd_memo,
+    'afk': _cmd_afk,
+    'leave': _cmd_leave,
+    'back': _cmd_back,
+    'rule': _cmd_rule,
+    'lores': _cmd_lores,
+    'npc': _cmd_npc,
+    'analyze': _cmd_analyze,
+    'ooc': _cmd_analyze,
+    'consistency': _cmd_consistency,
+    'worldrules': _cmd_worldrules,
+    'forecast': _cmd_forecast,
+    'doom': _cmd_doom,
+}
+
+
+# =========================================================
+# Discord 이벤트 핸들러
+# =========================================================
+@client_discord.event
+async def setup_hook():
+    """로그인 직후 1회 실행 (재연결 시에는 호출되지 않음) - 이벤트 루프 설정"""
+    # 첫 await 전에 끝나는 짧은 태스크는 스케줄링 없이 즉시 실행 (Python 3.12+, 이전 버전은 기본 팩토리 유지)
+    eager_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_factory:
+        asyncio.get_running_loop().set_task_factory(eager_factory)
+        logging.info("[Loop] eager 태스크 팩토리 사용")
+
+
+@client_discord.event
+async def on_ready():
+    """봇 준비 완료 시 실행"""
+    domain_manager.initialize_folders()
+    
+    logging.info(f"로그인 성공: {client_discord.user}")
+    print(f"--- Lorekeeper V{VERSION} Online ({client_discord.user}) ---")
+    print(f"Model: {MODEL_ID}")
+
+
+@client_discord.event
+async def on_message(message):
+    """메시지 수신 시 실행 (실제 처리는 백그라운드 태스크에서 수행)"""
+    # 봇 자신의 메시지 또는 빈 메시지 무시
+    if message.author == client_discord.user or not message.content:
+        return
+    
+    channel_id = str(message.channel.id)
+    
+    # !off는 채널 순서대로 처리되므로 그 전에 진행 중인 응답 생성부터 멈추도록 표시
+    toggle = BOT_TOGGLE_COMMANDS.get(message.content)
+    if toggle and toggle[0]:
+        _stream_abort_channels.add(channel_id)
+    
+    # 일반 채팅은 잠시 모아서 한 번에 처리 (분할된 긴 입력을 하나의 행동으로)
+    if _is_batchable_chat(message.content):
+        # 세션이 없거나 봇이 꺼진 채널의 일반 채팅은 버퍼/태스크 없이 버림 (참가는 명령어로만 가능)
+        if not domain_manager.has_session(channel_id) or domain_manager.is_bot_disabled(channel_id):
+            return
+        _buffer_chat(channel_id, message)
+        return
+    
+    # 명령어/OOC는 같은 채널의 대기 채팅을 먼저 흘려보내 순서를 유지
+    _flush_channel_chats(channel_id)
+    _schedule_message(message)
+
+
+def _is_batchable_chat(content: str) -> bool:
+    """병합 대상인 일반 채팅인지 확인합니다 (명령어/OOC 제외)."""
+    stripped = content.lstrip()
+    return not stripped.startswith('!') and '(ooc' not in stripped.lower()
+
+
+def _schedule_message(message, content: Optional[str] = None) -> None:
+    """메시지 처리를 백그라운드 태스크로 예약합니다."""
+    task = asyncio.create_task(_handle_message_with_limit(message, content))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _schedule_ferment(channel_id: str) -> None:
+    """장기 기억 발효를 백그라운드 태스크로 예약합니다 (응답 처리를 막지 않음)."""
+    if channel_id in _fermenting_channels:
+        return
+    _fermenting_channels.add(channel_id)
+    task = asyncio.create_task(_run_auto_ferment(channel_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _run_auto_ferment(channel_id: str) -> None:
+    """자동 발효를 실행하고 실패는 경고로만 기록합니다."""
+    try:
+        session_data = domain_manager.get_domain(channel_id)
+        fermentation.ensure_memory_fields(session_data)
+        
+        # 발효 필요 여부 체크 및 실행
+        if fermentation.should_ferment_fresh(session_data):
+            logging.info("[Fermentation] 자동 발효 시작 - %s", channel_id)
+            original_history = session_data["history"]
+            await fermentation.auto_ferment(
+                client_genai, MODEL_ID, session_data,
+                save_callback=lambda: _merge_fermented(channel_id, session_data, original_history)
+            )
+    except Exception as fe:
+        logging.warning(f"[Fermentation] 자동 발효 실패 (무시됨): {fe}")
+    finally:
+        _fermenting_channels.discard(channel_id)
+
+
+def _merge_fermented(channel_id: str, fermented: Dict[str, Any], original_history: List[Dict[str, Any]]) -> None:
+    """
+    발효 결과를 최신 세션 데이터에 병합하여 저장합니다.
+    
+    발효 도중 다른 메시지가 세션을 저장했을 수 있으므로 다시 로드한 뒤,
+    발효된 앞부분 기록만 제거하고 그 사이 추가된 기록은 보존합니다.
+    """
+    latest = domain_manager.get_domain(channel_id)
+    consumed = len(original_history) - len(fermented["history"])
+    
+    if latest["history"][:consumed] != original_history[:consumed]:
+        logging.warning(f"[Fermentation] 발효 중 기록이 변경되어 결과를 버립니다 - {channel_id}")
+        return
+    
+    latest["history"] = latest["history"][consumed:]
+    latest["fermented_history"] = fermented["fermented_history"]
+    latest["deep_memory"] = fermented["deep_memory"]
+    domain_manager.save_domain(channel_id, latest)
+
+
+def _buffer_chat(channel_id: str, message) -> None:
+    """채팅을 버퍼에 추가하고 병합 타이머를 (재)설정합니다."""
+    key = (channel_id, message.author.id)
+    entry = _pending_chats.get(key)
+    
+    if entry is None:
+        entry = _pending_chats[key] = {"parts": [], "message": message, "timer": None}
+    else:
+        entry["timer"].cancel()
+    
+    entry["parts"].append(message.content)
+    entry["message"] = message
+    
+    delay = CHAT_BATCH_LONG_DELAY if len(message.content) >= CHAT_BATCH_LONG_THRESHOLD else CHAT_BATCH_DELAY
+    entry["timer"] = asyncio.get_running_loop().call_later(delay, _flush_chat, key)
+
+
+def _flush_chat(key: Tuple[str, int]) -> None:
+    """버퍼에 모인 채팅을 하나로 합쳐 처리를 예약합니다."""
+    entry = _pending_chats.pop(key, None)
+    if entry is None:
+        return
+    
+    entry["timer"].cancel()
+    _schedule_message(entry["message"], "\n".join(entry["parts"]))
+
+
+def _flush_channel_chats(channel_id: str) -> None:
+    """해당 채널의 대기 중인 채팅 버퍼를 즉시 모두 처리합니다."""
+    for key in [k for k in _pending_chats if k[0] == channel_id]:
+        _flush_chat(key)
+
+
+async def _handle_message_with_limit(message, content: Optional[str] = None) -> None:
+    """
+    채널별 순서를 유지하면서 전체 동시 처리 수를 제한하여 메시지를 처리합니다.
+    
+    채널 락을 먼저 잡아 같은 채널의 대기 메시지가 전체 슬롯을 점유하지 않도록 합니다.
+    """
+    channel_id = str(message.channel.id)
+    lock = _channel_message_locks.get(channel_id)
+    if lock is None:
+        lock = _channel_message_locks[channel_id] = asyncio.Lock()
+    
+    try:
+        async with lock:
+            async with _message_semaphore:
+                await handle_message(message, content)
+    except Exception as e:
+        logging.error(f"메시지 처리 태스크 실패: {e}", exc_info=True)
+
+
+async def handle_message(message, content: Optional[str] = None) -> None:
+    """
+    수신된 메시지를 파싱하고 명령어/채팅을 처리합니다.
+    
+    Args:
+        message: Discord 메시지 (작성자/채널/리액션 대상)
+        content: 병합된 채팅 내용 (None이면 message.content 사용)
+    """
+    if content is None:
+        content = message.content
+    
+    try:
+        channel_id = str(message.channel.id)
+        
+        # 봇 On/Off 명령어
+        toggle = BOT_TOGGLE_COMMANDS.get(content)
+        if toggle:
+            disabled, reply = toggle
+            domain_manager.set_bot_disabled(channel_id, disabled)
+            _stream_abort_channels.discard(channel_id)
+            await message.channel.send(reply)
+            return
+        
+        # 봇이 비활성화된 경우 무시 (메모리 캐시 조회, 파싱/로드 전에 판단)
+        if domain_manager.is_bot_disabled(channel_id):
+            return
+        
+        # 입력 파싱
+        parsed = input_handler.parse_input(content)
+        if not parsed:
+            return
+        
+        cmd = parsed. get('command')
         
         # =========================================================
-        # 명령어 처리
+        # 보안:  참가자 및 잠금 확인
         # =========================================================
-        if parsed['type'] == 'command': 
-            
-            # --- 도움말 ---
-            if cmd == 'help':
-                help_msg = (
-                    "📚 **Lorekeeper 명령어 목록**\n\n"
-                    
-                    "**━━━ 🎭 캐릭터 ━━━**\n"
-                    "`!가면 [이름]` - 캐릭터 이름 설정\n"
-                    "`!설명 [내용]` - 캐릭터 설명 설정\n"
-                    "`!정보` - 캐릭터 정보 조회\n"
-                    "  ↳ `!정보 캐릭터` `관계` `패시브` `세계`\n\n"
-                    
-                    "**━━━ 📜 세션 ━━━**\n"
-                    "`!준비` - 세션 준비 상태 확인\n"
-                    "`!시작` - 세션 시작\n"
-                    "`!진행` - 기록된 행동 종합 후 다음 장면\n"
-                    "`!리셋` - 세션 초기화\n\n"
-                    
-                    "**━━━ 🌍 세계관 ━━━**\n"
-                    "`!로어 [파일]` - 세계관 설정\n"
-                    "`!룰 [내용]` - 룰 추가 (기본룰 자동 적용)\n"
-                    "`!퀘스트 [내용]` - 퀘스트 추가/조회\n"
-                    "`!메모 [내용]` - 메모 추가/조회\n"
-                    "`!연대기` - 연대기 조회\n"
-                    "`!연대기 생성` - AI가 스토리 요약\n"
-                    "`!연대기 추출` - 대화 로그 파일 저장 (증분)\n\n"
-                    
-                    "**━━━ 🎲 기타 ━━━**\n"
-                    "`!r [주사위]` - 선택적 주사위 (예: !r 1d20, !r 1d100)\n"
-                    "  └ 높을수록 좋은 결과, AI가 서사적으로 해석\n"
-                    "`!npc [이름]` - NPC 정보 조회\n"
-                    "`!분석 [질문]` - AI OOC 분석\n\n"
-                    
-                    "**━━━ ✏️ OOC 수정 ━━━**\n"
-                    "`(OOC: 요청 내용)` - 캐릭터 정보 수정\n"
-                    "예: `(OOC: 리엘이랑 친해진 걸로)`\n\n"
-                    
-                    "**━━━ 📖 성장 시스템 ━━━**\n"
-                    "레벨/경험치 대신 **패시브/칭호**로 성장!\n"
-                    "• 패시브: 반복 경험으로 습득 (독 내성, 야간 시야... )\n"
-                    "• 칭호: 특별한 업적으로 획득 (드래곤 슬레이어...)\n"
-                    "• 적응: 비일상에 노출될수록 익숙해짐\n\n"
-                    
-                    "**━━━ ⚖️ 판정 시스템 ━━━**\n"
-                    "기본:  AI가 패시브/칭호/상황으로 판정\n"
-                    "선택: 주사위 결과를 AI가 참고하여 해석"
-                )
-                await send_long_message(message.channel, help_msg)
-                return
-            
-            # --- 세션 관리 ---
-            if cmd == 'reset':
-                await session_manager.manager.execute_reset(
-                    message, client_discord, domain_manager, character_sheet
-                )
-                return
-            
-            if cmd == 'ready':
-                await session_manager. manager.check_preparation(message, domain_manager)
+        # 도메인 데이터는 메시지당 한 번만 로드하여 재사용 (파일 읽기는 워커 스레드에서)
+        uid = str(message.author.id)
+        domain_data, p_data, is_locked, is_prepared = await asyncio.to_thread(
+            domain_manager.get_message_gate_state, channel_id, uid
+        )
+        is_participant = p_data is not None
+        
+        # 비참가자는 입장 명령어만 사용 가능
+        if not is_participant:
+            if is_locked:
                 return
-            
-            if cmd == 'start':
-                domain_manager.update_participant(channel_id, message.author)
-                if await session_manager.manager.start_session(
-                    message, client_genai, MODEL_ID, domain_manager
-                ):
-                    system_trigger = "[System:  Generate a visceral opening scene for the campaign.]"
-                else:
+            if parsed['type'] == 'command': 
+                if cmd not in ENTRY_COMMANDS:
                     return
-            
-            if cmd == 'unlock':
-                domain_manager.set_session_lock(channel_id, False)
-                await message.channel.send("🔓 **잠금 해제**")
-                return
-            
-            if cmd == 'lock':
-                domain_manager.set_session_lock(channel_id, True)
-                await message. channel.send("🔒 **세션 잠금**")
-                return
-            
-            # --- 로어 명령어 ---
-            if cmd == 'lore':
-                await handle_lore_command(message, channel_id, parsed['content']. strip())
-                return
-            
-            # --- 모드 전환 ---
-            if cmd == 'mode':
-                arg = parsed['content'].strip()
-                if '대기' in arg or '수동' in arg:
-                    domain_manager.set_response_mode(channel_id, 'waiting')
-                    await message.channel.send(
-                        "⏸️ **대기 모드**\n"
-                        "플레이어 채팅은 기록만 됩니다.  (✏️)\n"
-                        "`!진행`으로 AI 응답을 받으세요."
-                    )
-                elif '자동' in arg:
-                    domain_manager.set_response_mode(channel_id, 'auto')
-                    await message. channel.send("▶️ **자동 모드** - 매 채팅마다 AI가 응답합니다.")
-                else:
-                    current = domain_manager.get_response_mode(channel_id)
-                    mode_name = "대기" if current == "waiting" else "자동"
-                    await message.channel.send(
-                        f"⚙️ **현재 모드:** {mode_name}\n"
-                        f"• `!모드 자동` - 매 채팅마다 AI 응  \n"
-                        f"• `!모드 대기` - `!진행` 전까지 기록만"
-                    )
-                return
-            
-            # --- 진행/턴 ---
-            if cmd in ['next', 'turn']:
-                system_trigger = "[System: 기록된 모든 플레이어 행동을 종합하여 다음 장면을 진행하세요.  각 캐릭터의 행동과 침묵 모두 고려하여 서사적으로 진행하세요.]"
-                await message.add_reaction("🎬")
-            
-            # --- 캐릭터 관리 ---
-            if cmd == 'mask':
-                target = parsed['content']
-                status = domain_manager.get_participant_status(channel_id, message.author.id)
-                
-                if status == "left":
-                    domain_manager.update_participant(channel_id, message.author, True)
-                    await message.channel.send("🆕 환생 완료")
-                
-                domain_manager.update_participant(channel_id, message.author)
-                domain_manager.set_user_mask(channel_id, message.author.id, target)
-                await message.channel.send(f"🎭 가면:  {target}")
-                return
-            
-            if cmd == 'desc':
-                domain_manager.update_participant(channel_id, message.author)
-                domain_manager.set_user_description(
-                    channel_id, message. author.id, parsed['content']
-                )
-                await message. channel.send("📝 저장됨")
-                return
-            
-            if cmd == 'info':
-                sub_cmd = parsed['content'].strip()
-                await handle_info_command(message, channel_id, sub_cmd)
-                return
-            
-            # --- 퀘스트/메모 직접 명령어 ---
-            if cmd == 'quest': 
-                arg = parsed['content'].strip()
-                if not arg:
-                    await send_long_message(
-                        message.channel,
-                        quest_manager.get_active_quests_text(channel_id)
-                    )
-                else:
-                    result = quest_manager.add_quest(channel_id, arg)
-                    await message.channel.send(result)
-                return
-            
-            if cmd == 'memo':
-                arg = parsed['content'].strip()
-                if not arg:
-                    await send_long_message(
-                        message.channel,
-                        quest_manager.get_memos_text(channel_id)
-                    )
-                else: 
-                    result = quest_manager.add_memo(channel_id, arg)
-                    await message.channel.send(result)
-                return
-            
-            # --- 참가자 상태 ---
-            if cmd == 'afk':
-                domain_manager. set_participant_status(channel_id, message.author.id, "afk")
-                await message. channel.send("💤")
-                return
-            
-            if cmd == 'leave':
-                domain_manager.set_participant_status(
-                    channel_id, message. author.id, "left", "이탈"
-                )
-                await message.channel.send("🚪")
-                return
-            
-            if cmd == 'back':
-                domain_manager.update_participant(channel_id, message.author)
-                await message.channel.send("✨")
-                return
-            
-            # --- 룰 명령어 ---
-            if cmd == 'rule':
-                await handle_rule_command(message, channel_id, parsed['content']. strip())
-                return
-            
-            # --- 연대기 ---
-            if cmd == 'lores':
-                await handle_chronicle_command(message, channel_id, parsed['content'].strip())
+            else:
                 return
-            
-            # --- NPC 정보 ---
-            if cmd == 'npc':
-                await handle_npc_info_command(
-                    message, channel_id, parsed. get('content', '').strip()
-                )
+        
+        # 준비되지 않은 세션에서 허용되는 명령어
+        if not is_prepared:
+            if parsed['type'] != 'command' or cmd not in ALLOWED_BEFORE_READY:
+                await message.channel.send("⚠️ `!준비`를 먼저 해주세요.")
                 return
-            
-            # --- AI 분석 도구 ---
-            if cmd == 'analyze' or cmd == 'ooc':
-                question = parsed. get('content', '').strip()
-                if not question:
-                    await message. channel.send(
-                        "🔍 **OOC 분석 모드**\n"
-                        "사용법: `!분석 [질문]` 또는 `!ooc [질문]`\n"
-                        "예: `!분석 이 NPC의 동기는 뭘까?`"
-                    )
-                    return
-                
-                if not client_genai: 
-                    await message.channel. send("⚠️ AI가 연결되지 않았습니다.")
-                    return
-                
-                loading = await message.channel.send("🔍 **[OOC 분석 중...]**")
-                
-                # 컨텍스트 수집 - domain_data 사용
-                lore = domain_manager.get_lore(channel_id)
-                history = domain_data.get('history', [])[-20:]
-                hist_text = "\n".join([f"{h['role']}: {h['content']}" for h in history])
-                
-                # 브레인스토밍 분석 호출
-                result = await memory_system.analyze_brainstorming(
-                    client_genai, MODEL_ID, hist_text, lore, question
-                )
-                
-                await safe_delete_message(loading)
-                
-                # 결과 포맷팅
-                if result. get("analysis_type") == "error":
-                    await message.channel.send(f"⚠️ 분석 실패: {result.get('recommendation')}")
-                else:
-                    response_text = (
-                        f"🔍 **[OOC 분석 결과]**\n\n"
-                        f"**현재 상황:** {result.get('current_state_summary', 'N/A')}\n\n"
-                    )
-                    
-                    if result.get('potential_paths'):
-                        response_text += "**가능한 경로:**\n"
-                        for i, path in enumerate(result.get('potential_paths', [])[:3], 1):
-                            response_text += f"{i}. {path. get('path', 'N/A')}\n"
-                    
-                    if result.get('recommendation'):
-                        response_text += f"\n**추천:** {result.get('recommendation')}\n"
-                    
-                    if result.get('open_questions'):
-                        response_text += "\n**열린 질문:**\n"
-                        for q in result. get('open_questions', [])[:3]:
-                            response_text += f"• {q}\n"
-                    
-                    await send_long_message(message.channel, response_text)
+        
+        # 잠기지 않은 세션의 일반 채팅은 응답 대상이 아니므로 디스패치 전에 종료 (가장 흔한 경우)
+        if not is_locked and parsed['type'] == 'chat':
+            return
+        
+        system_trigger = None
+        sources_task = None
+        ooc_notice = None
+        
+        # =========================================================
+        # 입력 유형별 처리
+        # =========================================================
+        match parsed['type']:
+            # 명령어 처리
+            case 'command':
+                handler = COMMAND_HANDLERS.get(cmd)
+                if handler:
+                    system_trigger = await handler(message, channel_id, parsed, domain_data)
+                    if not system_trigger:
+                        return
+            
+            # 주사위 처리
+            case 'dice':
+                await message.channel.send(parsed['content'])
+                domain_manager.append_history(channel_id, "System", f"Dice:  {parsed['content']}")
                 return
             
-            if cmd == 'consistency':
-                if not client_genai:
-                    await message.channel.send("⚠️ AI가 연결되지 않았습니다.")
+            # OOC (자연어 메모리 수정) 처리
+            case 'ooc':
+                ooc_content = parsed['content']
+                ai_mem = p_data.get('ai_memory', {}) if p_data else {}
+                if not ai_mem:
+                    await message.channel.send("❌ 먼저 `!가면`으로 캐릭터를 등록하세요.")
                     return
                 
-                loading = await message.channel. send("🔍 **[일관성 검사 중...]**")
-                
-                lore = domain_manager.get_lore(channel_id)
-                history = domain_data.get('history', [])[-30:]
-                hist_text = "\n".join([f"{h['role']}: {h['content']}" for h in history])
-                
-                result = await memory_system.check_narrative_consistency(
-                    client_genai, MODEL_ID, hist_text, lore
-                )
-                
-                await safe_delete_message(loading)
-                
-                response_text = f"📋 **[일관성 검   결과]**\n\n"
-                response_text += f"**전체 일관성:** {result.get('overall_consistency', 'Unknown')}\n\n"
-                
-                issues = result.get('issues', [])
-                if issues:
-                    response_text += "**발견된 문제:**\n"
-                    for issue in issues[:5]: 
-                        severity = "🔴" if issue.get('severity') == 'critical' else "🟡"
-                        response_text += f"{severity} [{issue.get('category')}] {issue.get('description')}\n"
-                else:
-                    response_text += "✅ 발견된 문제 없음\n"
-                
-                threads = result.get('plot_threads', [])
-                if threads:
-                    response_text += f"\n**활성 플롯 스레드:** {', '.join(threads[: 5])}\n"
-                
-                await send_long_message(message.channel, response_text)
-                return
-            
-            if cmd == 'worldrules':
                 if not client_genai:
-                    await message.channel.send("⚠️ AI가 연결되지 않았습니다.")
+                    await message.channel.send("⚠️ AI가 비활성화되어 OOC 수정이 불가능합니다.")
                     return
                 
-                loading = await message. channel.send("🌍 **[세계 규칙 추출 중...]**")
+                wait_msg = await message.channel.send("⏳ **[OOC]** 요청 처리 중...")
                 
-                lore = domain_manager.get_lore(channel_id)
-                
-                result = await memory_system.extract_world_constraints(
-                    client_genai, MODEL_ID, lore
+                edit_result, fields_str = await apply_ooc_edit(
+                    channel_id, uid, ooc_content, ai_mem, p_data
                 )
                 
-                await safe_delete_message(loading)
-                
-                if result: 
-                    response_text = "🌍 **[세계 규칙]**\n\n"
-                    
-                    if result.get('setting'):
-                        s = result['setting']
-                        response_text += f"**배경:** {s.get('era', 'N/A')} / {s.get('location', 'N/A')}\n"
-                    
-                    if result.get('theme'):
-                        t = result['theme']
-                        response_text += f"**장르:** {', '.join(t. get('genres', []))}\n"
-                        response_text += f"**분위기:** {t.get('tone', 'N/A')}\n"
-                    
-                    if result.get('systems'):
-                        response_text += "\n**시스템 규칙:**\n"
-                        for key, val in result['systems'].items():
-                            if val:
-                                response_text += f"• {key}:  {val}\n"
-                    
-                    if result.get('social', {}).get('taboos'):
-                        response_text += f"\n**금기:** {', '.join(result['social']['taboos'][:5])}\n"
+                if fields_str:
+                    confirm_msg = edit_result.get("confirmation_message", "✅ 수정 완료!")
+                    interpretation = edit_result.get("interpretation", "")
                     
-                    await send_long_message(message.channel, response_text)
+                    await safe_delete_message(wait_msg)
+                    await message.channel.send(
+                        f"✅ **[OOC 수정 완료]** {fields_str}\n"
+                        f"_{interpretation}_\n\n"
+                        f"{confirm_msg}\n\n"
+                        f"💡 `! 정보`로 변경사항을 확인하세요."
+                    )
                 else:
-                    await message.channel.send("⚠️ 세계 규칙 추출 실패")
-                return
-            
-            # --- Doom 예측 ---
-            if cmd == 'forecast':
-                forecast_msg = world_manager.get_doom_forecast(channel_id)
-                await send_long_message(message.channel, forecast_msg)
-                return
-            
-            # --- Doom 수동 조절 ---
-            if cmd == 'doom': 
-                arg = parsed. get('content', '').strip()
-                if not arg:
-                    status = world_manager.get_doom_status(channel_id)
+                    interpretation = edit_result.get("interpretation", "") if edit_result else ""
+                    await safe_delete_message(wait_msg)
                     await message.channel.send(
-                        f"📊 **위기 수치:** {status['value']}% ({status['description']})\n"
-                        f"{'🚨 위험!' if status['is_danger'] else '✅ 안전'}"
+                        f"❌ **[OOC]** 요청을 이해하지 못했습니다.\n"
+                        f"{f'_({interpretation})_' if interpretation else ''}\n\n"
+                        f"**사용법:** `(OOC: 요청 내용)`\n\n"
+                        f"**예시:**\n" 
+                        f"• `(OOC: 리엘이랑 친해진 걸로)` → 관계 수정\n"
+                        f"• `(OOC: 골드 500 줘)` → 💰 경제 수정\n"
+                        f"• `(OOC: 마법검 얻었어)` → 🎒 인벤토리 추가\n"
+                        f"• `(OOC: 중독 상태야)` → 💫 상태이상 추가\n"
+                        f"• `(OOC: 피로 풀렸어)` → 상태이상 제거"
                     )
-                    return
-                
-                try:
-                    amount = int(arg)
-                    result = world_manager.change_doom(channel_id, amount)
-                    await message.channel.send(result)
-                    
-                    event = world_manager.trigger_doom_event(channel_id)
-                    if event:
-                        await message.channel.send(event)
-                except ValueError:
-                    await message.channel.send("⚠️ 사용법: `!둠 [+/-숫자]` 또는 `!둠` (현재 상태)")
-                return
-        
-        # =========================================================
-        # 주사위 처리
-        # =========================================================
-        if parsed['type'] == 'dice':
-            await message.channel.send(parsed['content'])
-            domain_manager.append_history(channel_id, "System", f"Dice:  {parsed['content']}")
-            return
-        
-        # =========================================================
-        # OOC (자연어 메모리 수정) 처리
-        # =========================================================
-        if parsed['type'] == 'ooc':
-            ooc_content = parsed['content']
-            uid = str(message.author.id)
-            
-            ai_mem = domain_manager.get_ai_memory(channel_id, uid)
-            if not ai_mem:
-                await message.channel.send("❌ 먼저 `!가면`으로 캐릭터를 등록하세요.")
-                return
-            
-            if not client_genai:
-                await message.channel.send("⚠️ AI가 비활성화되어 OOC 수정이 불가능합니다.")
                 return
             
-            wait_msg = await message.channel.send("⏳ **[OOC]** 요청 처리 중...")
-            
-            p_data = domain_manager.get_participant_data(channel_id, uid)
-            
-            edit_result = await memory_system.process_ooc_memory_edit(
-                client_genai, MODEL_ID, ooc_content, ai_mem, p_data
-            )
-            
-            if edit_result and edit_result.get("edits"):
-                updated_mem, updated_participant = memory_system.apply_memory_edits(
-                    ai_mem, edit_result["edits"], p_data
-                )
-                domain_manager.update_ai_memory(channel_id, uid, updated_mem)
-                
-                if updated_participant:
-                    if "economy" in updated_participant:
-                        p_data["economy"] = updated_participant["economy"]
-                    if "inventory" in updated_participant:
-                        p_data["inventory"] = updated_participant["inventory"]
-                    if "status_effects" in updated_participant: 
-                        p_data["status_effects"] = updated_participant["status_effects"]
-                    domain_manager.save_participant_data(channel_id, uid, p_data)
-                
-                confirm_msg = edit_result.get("confirmation_message", "✅ 수정 완료!")
-                interpretation = edit_result.get("interpretation", "")
-                
-                edited_fields = list(set(e.get("field", "").split(". ")[0] for e in edit_result["edits"]))
-                field_emoji = {
-                    "relationships": "💞", "passives": "🏆", "known_info": "💡",
-                    "foreshadowing": "🔮", "normalization": "🌓", "appearance": "👁️",
-                    "personality": "💭", "background": "📖", "notes": "📋",
-                    "inventory": "🎒", "economy": "💰", "status_effects": "💫"
-                }
-                fields_str = " ".join([field_emoji.get(f, "📝") for f in edited_fields])
+            # OOC + 행동/대사 함께 처리 (chat_with_ooc)
+            case 'chat_with_ooc':
+                ooc_content = parsed. get('ooc_content', '')
+                chat_content = parsed.get('chat_content', '')
+                ai_mem = p_data.get('ai_memory', {}) if p_data else {}
                 
-                await safe_delete_message(wait_msg)
-                await message.channel.send(
-                    f"✅ **[OOC 수정 완료]** {fields_str}\n"
-                    f"_{interpretation}_\n\n"
-                    f"{confirm_msg}\n\n"
-                    f"💡 `! 정보`로 변경사항을 확인하세요."
-                )
-            else:
-                interpretation = edit_result.get("interpretation", "") if edit_result else ""
-                await safe_delete_message(wait_msg)
-                await message.channel.send(
-                    f"❌ **[OOC]** 요청을 이해하지 못했습니다.\n"
-                    f"{f'_({interpretation})_' if interpretation else ''}\n\n"
-                    f"**사용법:** `(OOC: 요청 내용)`\n\n"
-                    f"**예시:**\n" 
-                    f"• `(OOC: 리엘이랑 친해진 걸로)` → 관계 수정\n"
-                    f"• `(OOC: 골드 500 줘)` → 💰 경제 수정\n"
-                    f"• `(OOC: 마법검 얻었어)` → 🎒 인벤토리 추가\n"
-                    f"• `(OOC: 중독 상태야)` → 💫 상태이상 추가\n"
-                    f"• `(OOC: 피로 풀렸어)` → 상태이상 제거"
-                )
-            return
-        
-        # =========================================================
-        # OOC + 행동/대사 함께 처리 (chat_with_ooc)
-        # =========================================================
-        if parsed['type'] == 'chat_with_ooc':
-            ooc_content = parsed. get('ooc_content', '')
-            chat_content = parsed.get('chat_content', '')
-            uid = str(message.author.id)
-            
-            ai_mem = domain_manager.get_ai_memory(channel_id, uid)
-            p_data = domain_manager.get_participant_data(channel_id, uid)
-            ooc_applied = False
-            
-            if ai_mem and client_genai and ooc_content:
-                try:
-                    edit_result = await memory_system. process_ooc_memory_edit(
-                        client_genai, MODEL_ID, ooc_content, ai_mem, p_data
+                if ai_mem and client_genai and ooc_content:
+                    # 로어/룰 파일은 OOC 수정과 무관하므로 AI 해석 중에 미리 읽어 둠
+                    sources_task = asyncio.create_task(
+                        asyncio.to_thread(load_narrative_sources, channel_id)
                     )
-                    
-                    if edit_result and edit_result.get("edits"):
-                        updated_mem, updated_participant = memory_system. apply_memory_edits(
-                            ai_mem, edit_result["edits"], p_data
+                    try:
+                        _, fields_str = await apply_ooc_edit(
+                            channel_id, uid, ooc_content, ai_mem, p_data
                         )
-                        domain_manager.update_ai_memory(channel_id, uid, updated_mem)
                         
-                        if updated_participant:
-                            if "economy" in updated_participant:
-                                p_data["economy"] = updated_participant["economy"]
-                            if "inventory" in updated_participant:
-                                p_data["inventory"] = updated_participant["inventory"]
-                            if "status_effects" in updated_participant:
-                                p_data["status_effects"] = updated_participant["status_effects"]
-                            domain_manager.save_participant_data(channel_id, uid, p_data)
-                        
-                        ooc_applied = True
-                        
-                        edited_fields = list(set(e.get("field", "").split(".")[0] for e in edit_result["edits"]))
-                        field_emoji = {
-                            "relationships": "💞", "passives": "🏆", "known_info": "💡",
-                            "foreshadowing": "🔮", "normalization": "🌓", "appearance": "👁️",
-                            "personality": "💭", "background": "📖", "notes": "📋",
-                            "inventory": "🎒", "economy": "💰", "status_effects":  "💫"
-                        }
-                        fields_str = " ".join([field_emoji.get(f, "📝") for f in edited_fields])
-                        await message.channel.send(f"✅ **[OOC 적용]** {fields_str}")
-                except Exception as e:
-                    logging.warning(f"OOC 적용 실패: {e}")
-            
-            # 행동/대사는 일반 chat으로 처리 계속 진행
-            parsed = {
-                'type': 'chat',
-                'content': chat_content,
-                'style': parsed.get('style', {})
-            }
+                        # 적용 알림은 AI 응답 직전 알림 메시지에 합쳐서 전송
+                        if fields_str:
+                            ooc_notice = f"✅ **[OOC 적용]** {fields_str}"
+                    except Exception as e:
+                        logging.warning(f"OOC 적용 실패: {e}")
+                
+                # 행동/대사는 일반 chat으로 처리 계속 진행
+                parsed = {
+                    'type': 'chat',
+                    'content': chat_content,
+                    'style': parsed.get('style', {})
+                }
         
         # =========================================================
         # AI 응답 생성
@@ -1255,453 +1935,317 @@ async def on_message(message):
         if parsed['type'] == 'command' and not system_trigger:
             return
         
-        # 세션 잠금 확인 (domain_data는 위에서 이미 가져옴)
-        if not domain_data['settings'].get('session_locked', False) and not system_trigger:
+        # 세션 잠금 확인 (게이트 상태는 위에서 이미 가져옴)
+        if not is_locked and not system_trigger:
+            if ooc_notice:
+                await message.channel.send(ooc_notice)
             return
         
         async with message.channel.typing():
-            if not domain_manager.update_participant(channel_id, message.author):
+            # 참가자 갱신/OOC 적용 이후 상태 (update_participant가 저장한 데이터를 그대로 사용)
+            domain_data = domain_manager.update_participant(channel_id, message.author)
+            if not domain_data:
+                if ooc_notice:
+                    await message.channel.send(ooc_notice)
                 return
             
-            user_mask = domain_manager.get_user_mask(channel_id, message.author.id)
+            p_data = domain_data['participants'].get(uid)
+            
+            user_mask = p_data.get('mask', 'Unknown') if p_data else 'Unknown'
             action_text = system_trigger if system_trigger else f"[{user_mask}]:  {parsed['content']}"
             
             # 대기 모드에서는 기록만 하고 AI 응답 생성 안 함
-            response_mode = domain_manager.get_response_mode(channel_id)
+            response_mode = domain_data['settings'].get('response_mode', 'auto')
             if response_mode == 'waiting' and not system_trigger:
                 domain_manager.append_history(channel_id, "User", action_text)
                 await message.add_reaction("✏️")
+                if ooc_notice:
+                    await message.channel.send(ooc_notice)
                 return
             
-            # 컨텍스트 수집
-            summary = domain_manager.get_lore_summary(channel_id)
-            lore_txt = summary if summary else domain_manager.get_lore(channel_id)
-            rule_txt = domain_manager.get_rules(channel_id)
-            world_ctx = world_manager.get_world_context(channel_id)
-            obj_ctx = quest_manager.get_objective_context(channel_id)
-            active_genres = domain_manager.get_active_genres(channel_id)
-            custom_tone = domain_manager.get_custom_tone(channel_id)
-            
-            history = domain_data.get('history', [])[-10:]
-            hist_text = "\n".join([f"{h['role']}: {h['content']}" for h in history])
-            hist_text += f"\nUser: {action_text}"
+            # AI 클라이언트가 없으면 프롬프트 조립 전에 종료 (기록만 남김)
+            if not client_genai:
+                domain_manager.append_history(channel_id, "User", action_text)
+                notices = [ooc_notice] if ooc_notice else []
+                notices.append("⚠️ AI Error: 클라이언트가 설정되지 않았습니다 (GEMINI_API_KEY 확인).")
+                await message.channel.send("\n".join(notices))
+                return
             
-            active_quests = domain_manager.get_quest_board(channel_id).get("active", [])
+            # 컨텍스트 수집 (OOC 처리 중 미리 읽은 로어/룰이 있으면 재사용)
+            if sources_task:
+                lore_txt, rule_txt, sources_hash = await sources_task
+            else:
+                lore_txt, rule_txt, sources_hash = await asyncio.to_thread(load_narrative_sources, channel_id)
+            world_ctx = world_manager.get_world_context(channel_id, domain_data)
+            obj_ctx = quest_manager.get_objective_context(channel_id, domain_data.get('quest_board'))
+            domain_get = domain_data.get
+            active_genres = domain_get('active_genres', ['noir'])
+            custom_tone = domain_get('custom_tone')
+            history = domain_get('history') or []
+            
+            recent_hist = domain_manager.get_history_text(channel_id, 10, history)
+            hist_text = f"{recent_hist}\nUser: {action_text}"
+            
+            active_quests = (domain_get('quest_board') or {}).get("active", [])
             quest_txt = " | ".join(active_quests) if active_quests else "None"
             
             # 플레이어 컨텍스트 수집 (패시브 중복 방지용)
-            uid = str(message.author.id)
-            p_data = domain_manager.get_participant_data(channel_id, uid)
             player_context = ""
             if p_data: 
                 player_context = simulation_manager.get_passives_for_context(p_data)
             
-            # AI 분석 (좌뇌)
-            nvc_res = {}
-            if client_genai: 
-                nvc_res = await memory_system.analyze_context_nvc(
-                    client_genai, MODEL_ID, hist_text, lore_txt, rule_txt, quest_txt,
-                    player_context=player_context
-                )
-                
-                if nvc_res. get("CurrentLocation"):
-                    domain_manager.set_current_location(channel_id, nvc_res["CurrentLocation"])
-                if nvc_res.get("LocationRisk"):
-                    domain_manager. set_current_risk(channel_id, nvc_res["LocationRisk"])
-            
-            # 시스템 액션 처리
-            sys_action = nvc_res.get("SystemAction", {})
-            auto_msg = await process_ai_system_action(message, channel_id, sys_action)
-            
-            # === AI 메모리 자동 갱신 (하이브리드 시스템) ===
-            memory_msgs = memory_system.apply_ai_memory_updates(
-                channel_id, uid, nvc_res, domain_manager
-            )
-            
-            # AI 메모리 컨텍스트 생성 (우뇌에게 전달)
-            ai_memory_ctx = domain_manager.get_full_ai_context(channel_id, uid)
-            
-            # Temporal Orientation 추출
-            temporal = nvc_res.get("TemporalOrientation", {})
-            temporal_ctx = ""
-            if temporal:
-                temporal_ctx = (
-                    f"### [TEMPORAL ORIENTATION]\n"
-                    f"Continuity: {temporal.get('continuity_from_previous', 'N/A')}\n"
-                    f"Active Threads: {', '.join(temporal.get('active_threads', []))}\n"
-                    f"Off-screen NPCs: {', '.join(temporal.get('offscreen_npcs', []))}\n"
-                    f"Focus:  {temporal.get('suggested_focus', 'N/A')}\n\n"
-                )
-            
-            # NPC 태도 컨텍스트 생성
-            npc_attitudes = nvc_res.get("NPCAttitudes", {})
-            npc_attitude_ctx = ""
-            if npc_attitudes:
-                npc_attitude_ctx = "### [NPC ATTITUDES]\n"
-                for npc_name, attitude_data in npc_attitudes.items():
-                    if isinstance(attitude_data, dict):
-                        att = attitude_data.get("attitude", "neutral")
-                        reason = attitude_data.get("reason", "")
-                        speech_hints = {
-                            "hostile": "위협적, 조롱, 정보 숨김",
-                            "unfriendly": "퉁명스럽고 짧음, 비협조",
-                            "neutral": "정중하고 사무적",
-                            "friendly": "따뜻하고 친근, 정보 제공",
-                            "devoted": "존경/애정, 비밀 공유 가능"
-                        }
-                        hint = speech_hints.get(att, "")
-                        npc_attitude_ctx += f"- **{npc_name}**: {att} ({reason}) → 말투: {hint}\n"
-                npc_attitude_ctx += "\n"
-            
-            # NPC간 대화 컨텍스트 생성
-            npc_interaction = nvc_res.get("NPCInteraction")
-            npc_interaction_ctx = ""
-            if npc_interaction and isinstance(npc_interaction, dict):
-                participants = npc_interaction.get("participants", [])
-                interaction_type = npc_interaction.get("type", "")
-                topic = npc_interaction.get("topic", "")
-                mood = npc_interaction.get("mood", "")
-                if participants and len(participants) >= 2:
-                    npc_interaction_ctx = (
-                        f"### [NPC INTERACTION OPPORTUNITY]\n"
-                        f"NPCs present: {', '.join(participants)}\n"
-                        f"Type: {interaction_type} | Mood: {mood}\n"
-                        f"Suggested topic: {topic}\n"
-                        f"**Instruction:** Include ambient dialogue between these NPCs "
-                        f"that players can overhear.  This adds atmosphere and may reveal information.\n\n"
-                    )
-            
-            # === [5] FERMENTED 메모리 컨텍스트 ===
-            fermented_ctx = ""
-            try:
-                fermented_ctx = fermentation. build_fermented_context(domain_data)
-            except Exception as fme:
-                logging.warning(f"[Fermentation] Fermented 컨텍스트 빌드 실패: {fme}")
-            
-            # === [10] Current Context 구성 ===
-            current_context_parts = []
-            
-            if world_ctx or obj_ctx: 
-                current_context_parts. append(f"### World State\n{world_ctx}\n{obj_ctx}")
-            
-            if temporal_ctx:
-                current_context_parts.append(temporal_ctx. strip())
-            
-            if ai_memory_ctx:
-                current_context_parts.append(f"### AI Memory\n{ai_memory_ctx}")
-            
-            if npc_attitude_ctx:
-                current_context_parts.append(npc_attitude_ctx.strip())
-            
-            if npc_interaction_ctx:
-                current_context_parts.append(npc_interaction_ctx.strip())
-            
-            nvc_summary = (
-                f"### Left Hemisphere Analysis\n"
-                f"Location: {nvc_res.get('CurrentLocation', 'Unknown')} "
-                f"(Risk: {nvc_res. get('LocationRisk', 'Low')})\n"
-                f"Physical State: {nvc_res.get('PhysicalState', 'N/A')}\n"
-                f"Observation: {nvc_res.get('Observation', 'N/A')}\n"
-                f"Need: {nvc_res.get('Need', 'N/A')}"
-            )
-            current_context_parts.append(nvc_summary)
-            
-            current_context = "\n\n".join(current_context_parts)
-            
             # DEEP MEMORY 추출
-            deep_memory = domain_data.get("deep_memory", "")
+            deep_memory = domain_get("deep_memory", "")
             
             # 발효 요약 추출
-            fermented_summaries = []
-            for entry in domain_data.get("fermented_history", []):
-                if entry.get("summary"):
-                    fermented_summaries.append(entry["summary"])
-            fermented_summary_text = "\n---\n".join(fermented_summaries)
-            
-            # === 프리셋 순서 기반 full_prompt 구성 ===
-            full_prompt = ""
-            
-            if fermented_ctx:
-                full_prompt += f"{fermented_ctx}\n\n"
+            fermented_summary_text = "\n---\n".join(
+                summary for entry in domain_get("fermented_history", ())
+                if (summary := entry.get("summary"))
+            )
             
-            full_prompt += f"""<Current-Context>
-{current_context}
-</Current-Context>
-
-"""
+            session_coro = prepare_narrative_session(
+                channel_id, lore_txt, rule_txt, sources_hash, active_genres, custom_tone,
+                deep_memory, fermented_summary_text, history
+            )
             
-            full_prompt += f"""<User_Message>
-### Material (플레이어 입력)
-<material>
-{action_text}
-</material>
-</User_Message>
-
-"""
+            # 로딩 메시지 전송(Discord 왕복)도 좌뇌 분석/세션 준비와 겹쳐서 진행
+            loading_task = asyncio.create_task(
+                message.channel.send(f"⏳ **[Lorekeeper]** 집필 중...")
+            )
             
-            full_prompt += """### [OUTPUT DIRECTIVE]
-Process <material> as the player's attempt. 
-Players are identified by [Name]:  prefix (e.g., [잭]: , [리사]:).
-Generate NPC reactions and world response ONLY.
-**Apply NPC attitudes to their speech and behavior.**
-**If NPC Interaction is suggested, include their ambient dialogue.**
-**CRITICAL: Reference the FERMENTED/DEEP MEMORY above for story continuity.**
-Do NOT generate ANY player's dialogue, thoughts, or decisions.
-Track each player separately.  3rd person narration.  Korean output."""
+            # 좌뇌 분석 생략 조건:
+            # - "대기", "ㅇㅇ" 같은 아주 짧은 플레이어 입력 (시스템 트리거는 길이와 무관하게 분석)
+            # - 기록이 전혀 없는 첫 장면 (오프닝 등 - 분석할 상황 자체가 없음)
+            if not history:
+                skip_reason = "기록 없음"
+            elif not system_trigger and len(parsed['content'].strip()) <= NVC_SKIP_MAX_LENGTH:
+                skip_reason = "짧은 입력"
+            else:
+                skip_reason = None
             
-            response = "⚠️ AI Error"
-            if client_genai:
-                loading = await message.channel.send(
-                    f"⏳ **[Lorekeeper]** 집필 중..."
+            # 분석/세션 준비/생성 중 예외가 나도 로딩 메시지가 채널에 남지 않도록 항상 정리
+            try:
+                if skip_reason:
+                    logging.info("[NVC] %s으로 좌뇌 분석 생략 - %s", skip_reason, channel_id)
+                    nvc_res = {}
+                    session = await session_coro
+                else:
+                    # AI 분석 (좌뇌)과 우뇌 세션 준비(캐시 확인/생성, 히스토리 주입)를 동시에 진행
+                    nvc_res, session = await asyncio.gather(
+                        memory_system.analyze_context_nvc(
+                            client_genai, MODEL_ID, hist_text, lore_txt, rule_txt, quest_txt,
+                            player_context=player_context
+                        ),
+                        session_coro
+                    )
+                nvc_get = nvc_res.get
+                
+                location = nvc_get("CurrentLocation")
+                risk = nvc_get("LocationRisk")
+                if location or risk:
+                    domain_manager.update_scene_state(channel_id, location, risk)
+                
+                # 시스템 액션 처리
+                sys_action = nvc_get("SystemAction", {})
+                auto_msg = await process_ai_system_action(message, channel_id, sys_action)
+                
+                # === AI 메모리 자동 갱신 (하이브리드 시스템) ===
+                # 세션 저장이 발효 병합/기록 버퍼와 경합하지 않도록 이벤트 루프에서 직접 실행
+                memory_msgs = memory_system.apply_ai_memory_updates(
+                    channel_id, uid, nvc_res, domain_manager
                 )
                 
-                # 캐싱 세션 생성 시도 (프리셋 순서 적용)
-                try:
-                    session, used_cache = await persona. create_cached_session(
-                        client_genai, MODEL_ID, channel_id,
-                        lore_txt, rule_txt,
-                        active_genres, custom_tone, deep_memory,
-                        fermentation_module=fermentation
-                    )
-                    if used_cache:
-                        logging.info(f"[Session] 캐싱 세션 사용 - {channel_id}")
-                except Exception as cache_err:
-                    logging.warning(f"[Session] 캐싱 실패, 일반 세션 사용:  {cache_err}")
-                    # 수정: fermented_summary 파라미터 추가
-                    session = persona.create_risu_style_session(
-                        client_genai, MODEL_ID, lore_txt, rule_txt,
-                        active_genres, custom_tone, deep_memory,
-                        fermented_summary=fermented_summary_text,
-                        character_descriptions=""
+                # Temporal Orientation 추출
+                temporal = nvc_get("TemporalOrientation", {})
+                temporal_ctx = ""
+                if temporal:
+                    temporal_ctx = (
+                        f"### [TEMPORAL ORIENTATION]\n"
+                        f"Continuity: {temporal.get('continuity_from_previous', 'N/A')}\n"
+                        f"Active Threads: {', '.join(temporal.get('active_threads', []))}\n"
+                        f"Off-screen NPCs: {', '.join(temporal.get('offscreen_npcs', []))}\n"
+                        f"Focus:  {temporal.get('suggested_focus', 'N/A')}"
                     )
                 
-                # 히스토리 추가
-                for h in domain_data.get('history', []):
-                    role = "user" if h['role'] == "User" else "model"
-                    session.history.append(
-                        types.Content(role=role, parts=[types.Part(text=h['content'])])
-                    )
+                # NPC 태도 컨텍스트 생성
+                npc_attitudes = nvc_get("NPCAttitudes", {})
+                npc_attitude_ctx = ""
+                if npc_attitudes:
+                    attitude_parts = ["### [NPC ATTITUDES]"]
+                    for npc_name, attitude_data in npc_attitudes.items():
+                        if isinstance(attitude_data, dict):
+                            att = attitude_data.get("attitude", "neutral")
+                            reason = attitude_data.get("reason", "")
+                            attitude_parts.append(
+                                NPC_ATTITUDE_LINE.format(npc_name, att, reason, NPC_SPEECH_HINTS.get(att, ""))
+                            )
+                    npc_attitude_ctx = "\n".join(attitude_parts)
                 
-                # 응답 생성
-                response = await persona.generate_response_with_retry(
-                    client_genai, session, full_prompt
-                )
+                # NPC간 대화 컨텍스트 생성
+                npc_interaction = nvc_get("NPCInteraction")
+                npc_interaction_ctx = ""
+                if npc_interaction and isinstance(npc_interaction, dict):
+                    participants = npc_interaction.get("participants", [])
+                    interaction_type = npc_interaction.get("type", "")
+                    topic = npc_interaction.get("topic", "")
+                    mood = npc_interaction.get("mood", "")
+                    if participants and len(participants) >= 2:
+                        npc_interaction_ctx = (
+                            f"### [NPC INTERACTION OPPORTUNITY]\n"
+                            f"NPCs present: {', '.join(participants)}\n"
+                            f"Type: {interaction_type} | Mood: {mood}\n"
+                            f"Suggested topic: {topic}\n"
+                            f"**Instruction:** Include ambient dialogue between these NPCs "
+                            f"that players can overhear.  This adds atmosphere and may reveal information."
+                        )
+                
+                # === [5] FERMENTED 메모리 컨텍스트 ===
+                fermented_ctx = ""
+                try:
+                    fermented_ctx = fermentation. build_fermented_context(domain_data)
+                except Exception as fme:
+                    logging.warning(f"[Fermentation] Fermented 컨텍스트 빌드 실패: {fme}")
+                
+                # AI 메모리 컨텍스트 생성 (우뇌에게 전달, 자동 갱신 반영 후)
+                ai_memory_ctx = domain_manager.get_full_ai_context(channel_id, uid)
+                
+                # === [10] Current Context 구성 ===
+                current_context_parts = []
+                
+                if world_ctx or obj_ctx: 
+                    current_context_parts. append(f"### World State\n{world_ctx}\n{obj_ctx}")
                 
-                await safe_delete_message(loading)
+                if temporal_ctx:
+                    current_context_parts.append(temporal_ctx)
                 
-                # === 우뇌 응답에서 SYSTEM_UPDATE 파싱 ===
-                if response: 
-                    system_update_match = re.search(
-                        r'```system_update\s*\n?\s*(\{.*?\})\s*\n? ```',
-                        response,
-                        re.DOTALL
+                if ai_memory_ctx:
+                    current_context_parts.append(f"### AI Memory\n{ai_memory_ctx}")
+                
+                if npc_attitude_ctx:
+                    current_context_parts.append(npc_attitude_ctx)
+                
+                if npc_interaction_ctx:
+                    current_context_parts.append(npc_interaction_ctx)
+                
+                if nvc_res:
+                    nvc_summary = (
+                        f"### Left Hemisphere Analysis\n"
+                        f"Location: {nvc_get('CurrentLocation', 'Unknown')} "
+                        f"(Risk: {nvc_get('LocationRisk', 'Low')})\n"
+                        f"Physical State: {nvc_get('PhysicalState', 'N/A')}\n"
+                        f"Observation: {nvc_get('Observation', 'N/A')}\n"
+                        f"Need: {nvc_get('Need', 'N/A')}"
                     )
-                    
-                    if system_update_match:
-                        try:
-                            update_json = json.loads(system_update_match.group(1))
-                            
-                            p_data = domain_manager.get_participant_data(channel_id, uid)
-                            ai_mem = domain_manager.get_ai_memory(channel_id, uid)
-                            
-                            if p_data and ai_mem: 
-                                update_msgs = []
-                                p_updated = False
-                                mem_updated = False
-                                
-                                # ========== 참가자 데이터 (p_data) ==========
-                                
-                                # 인벤토리 추가
-                                if update_json.get("inventory_add"):
-                                    if "inventory" not in p_data: 
-                                        p_data["inventory"] = {}
-                                    for item, amount in update_json["inventory_add"].items():
-                                        p_data["inventory"][item] = p_data["inventory"].get(item, 0) + int(amount)
-                                        update_msgs.append(f"🎒 **+{item}**")
-                                    p_updated = True
-                                
-                                # 인벤토리 제거
-                                if update_json.get("inventory_remove"):
-                                    if "inventory" not in p_data:
-                                        p_data["inventory"] = {}
-                                    for item, amount in update_json["inventory_remove"].items():
-                                        if item in p_data["inventory"]:
-                                            p_data["inventory"][item] = max(0, p_data["inventory"][item] - int(amount))
-                                            if p_data["inventory"][item] <= 0:
-                                                del p_data["inventory"][item]
-                                            update_msgs.append(f"🎒 **-{item}**")
-                                    p_updated = True
-                                
-                                # 골드 변경
-                                if update_json.get("gold_change") is not None:
-                                    if "economy" not in p_data: 
-                                        p_data["economy"] = {"gold": 0}
-                                    change = int(update_json["gold_change"])
-                                    p_data["economy"]["gold"] = max(0, p_data["economy"]. get("gold", 0) + change)
-                                    if change > 0:
-                                        update_msgs.append(f"💰 **+{change}**")
-                                    elif change < 0:
-                                        update_msgs.append(f"💰 **{change}**")
-                                    p_updated = True
-                                
-                                # 상태이상 추가
-                                if update_json.get("status_add"):
-                                    if "status_effects" not in p_data: 
-                                        p_data["status_effects"] = []
-                                    for status in update_json["status_add"]:
-                                        if status not in p_data["status_effects"]:
-                                            p_data["status_effects"]. append(status)
-                                            update_msgs.append(f"💫 **{status}**")
-                                    p_updated = True
-                                
-                                # 상태이상 제거
-                                if update_json.get("status_remove"):
-                                    if "status_effects" not in p_data:
-                                        p_data["status_effects"] = []
-                                    for status in update_json["status_remove"]:
-                                        if status in p_data["status_effects"]:
-                                            p_data["status_effects"].remove(status)
-                                            update_msgs.append(f"✨ **{status} 해제**")
-                                    p_updated = True
-                                
-                                # ========== AI 메모리 (ai_mem) ==========
-                                
-                                # 관계 업데이트
-                                if update_json.get("relationship_update"):
-                                    if "relationships" not in ai_mem:
-                                        ai_mem["relationships"] = {}
-                                    for npc, desc in update_json["relationship_update"].items():
-                                        ai_mem["relationships"][npc] = desc
-                                        update_msgs.append(f"💞 **{npc}**")
-                                    mem_updated = True
-                                
-                                # 패시브 추가
-                                if update_json.get("passive_add"):
-                                    if "passives" not in ai_mem: 
-                                        ai_mem["passives"] = []
-                                    for passive in update_json["passive_add"]: 
-                                        if passive not in ai_mem["passives"]:
-                                            ai_mem["passives"].append(passive)
-                                            update_msgs.append(f"🏆 **{passive}**")
-                                    mem_updated = True
-                                
-                                # 알고있는 정보 추가
-                                if update_json.get("info_add"):
-                                    if "known_info" not in ai_mem:
-                                        ai_mem["known_info"] = []
-                                    for info in update_json["info_add"]: 
-                                        if info not in ai_mem["known_info"]: 
-                                            ai_mem["known_info"].append(info)
-                                            update_msgs. append(f"💡 **정보**")
-                                    mem_updated = True
-                                
-                                # 복선 추가
-                                if update_json.get("foreshadow_add"):
-                                    if "foreshadowing" not in ai_mem: 
-                                        ai_mem["foreshadowing"] = []
-                                    for fs in update_json["foreshadow_add"]:
-                                        if fs not in ai_mem["foreshadowing"]: 
-                                            ai_mem["foreshadowing"].append(fs)
-                                            update_msgs. append(f"🔮 **복선**")
-                                    mem_updated = True
-                                
-                                # 적응도 업데이트
-                                if update_json.get("adaptation_update"):
-                                    if "normalization" not in ai_mem: 
-                                        ai_mem["normalization"] = {}
-                                    for element, status in update_json["adaptation_update"].items():
-                                        ai_mem["normalization"][element] = status
-                                        update_msgs.append(f"🌓 **{element}**")
-                                    mem_updated = True
-                                
-                                # 외형 업데이트
-                                if update_json.get("appearance_update"):
-                                    current = ai_mem.get("appearance", "")
-                                    new_appearance = update_json["appearance_update"]
-                                    if current: 
-                                        ai_mem["appearance"] = f"{current} {new_appearance}"
-                                    else:
-                                        ai_mem["appearance"] = new_appearance
-                                    update_msgs. append(f"👁️ **외형 변화**")
-                                    mem_updated = True
-                                
-                                # 성격 업데이트
-                                if update_json.get("personality_update"):
-                                    current = ai_mem.get("personality", "")
-                                    new_personality = update_json["personality_update"]
-                                    if current:
-                                        ai_mem["personality"] = f"{current} {new_personality}"
-                                    else:
-                                        ai_mem["personality"] = new_personality
-                                    update_msgs.append(f"💭 **성격 변화**")
-                                    mem_updated = True
-                                
-                                # 배경 업데이트
-                                if update_json.get("background_update"):
-                                    current = ai_mem.get("background", "")
-                                    new_background = update_json["background_update"]
-                                    if current:
-                                        ai_mem["background"] = f"{current} {new_background}"
-                                    else:
-                                        ai_mem["background"] = new_background
-                                    update_msgs.append(f"📖 **배경 추가**")
-                                    mem_updated = True
-                                
-                                # 저장
-                                if p_updated: 
-                                    domain_manager.save_participant_data(channel_id, uid, p_data)
-                                if mem_updated:
-                                    domain_manager.update_ai_memory(channel_id, uid, ai_mem)
-                                
-                                # 업데이트 메시지 출력
-                                if update_msgs:
-                                    await message.channel.send(" | ".join(update_msgs))
-                        
-                        except json.JSONDecodeError as je:
-                            logging.warning(f"[SYSTEM_UPDATE] JSON 파싱 실패:  {je}")
-                        except Exception as ue:
-                            logging.warning(f"[SYSTEM_UPDATE] 업데이트 실패: {ue}")
-                        
-                        # 응답에서 system_update 블록 제거 (출력에서 숨김)
-                        response = re.sub(
-                            r'\s*```system_update\s*\n?\s*\{.*?\}\s*\n?```\s*',
-                            '',
-                            response,
-                            flags=re.DOTALL
-                        ).strip()
+                    current_context_parts.append(nvc_summary)
+                
+                current_context = "\n\n".join(current_context_parts)
+                
+                # === 프리셋 순서 기반 full_prompt 구성 ===
+                full_prompt = "".join((
+                    fermented_ctx,
+                    "\n\n" if fermented_ctx else "",
+                    CURRENT_CONTEXT_TEMPLATE.format(current_context),
+                    USER_MESSAGE_TEMPLATE.format(action_text)
+                ))
+                
+                update_summary = ""
+                loading = await loading_task
+                
+                # 응답 생성 (스트리밍 조각을 로딩 메시지에 점진적으로 표시)
+                loop = asyncio.get_running_loop()
+                last_edit = loop.time()
                 
-                # 응답 길이 로깅
-                if response: 
-                    logging.info(f"[Response] Length: {len(response)}자")
+                async def show_progress(current_text) -> None:
+                    nonlocal last_edit
+                    now = loop.time()
+                    if now - last_edit <= STATUS_EDIT_INTERVAL:
+                        return
+                    last_edit = now
+                
+                    # 상태 업데이트 블록은 미리보기에서 숨김 (누적 텍스트는 편집할 때만 합침)
+                    preview = current_text().split("```system_update", 1)[0].rstrip()
+                    if not preview:
+                        return
+                    try:
+                        await loading.edit(content=preview[-STREAM_PREVIEW_LENGTH:])
+                    except discord.HTTPException as edit_err:
+                        logging.debug("[Stream] 미리보기 편집 실패: %s", edit_err)
+                
+                response = await persona.generate_response_stream_with_retry(
+                    client_genai, session, full_prompt, on_progress=show_progress,
+                    should_abort=lambda: channel_id in _stream_abort_channels
+                )
+            finally:
+                await discard_sent_message(loading_task)
             
-            # 결과 전송
-            if auto_msg:
-                await message.channel. send(f"🤖 {auto_msg}")
+            # !off로 생성이 중단되면 꺼진 채널에 후속 알림도 보내지 않음
+            if response is None:
+                return
             
-            # AI 메모리 갱신 메시지 출력
+            # === 우뇌 응답에서 SYSTEM_UPDATE 파싱 ===
+            # 블록 표식이 없으면 (대부분의 응답) 정규식 탐색 자체를 생략
+            if response and "```system_update" in response:
+                system_update_match = SYSTEM_UPDATE_PATTERN.search(response)
+                
+                if system_update_match:
+                    try:
+                        update_block = system_update_match.group(1)
+                        update_json = orjson.loads(update_block) if orjson else json.loads(update_block)
+                        
+                        # 응답에 실제로 포함된 키만 처리
+                        updates = [
+                            (SYSTEM_UPDATE_HANDLERS[key], value)
+                            for key, value in update_json.items()
+                            if value and key in SYSTEM_UPDATE_HANDLERS
+                        ]
+                        
+                        if updates:
+                            # 참가자 데이터와 AI 메모리를 한 번 로드해 제자리 수정 후 한 번만 저장
+                            with domain_manager.transaction(channel_id) as d:
+                                p_data = d["participants"].get(uid)
+                                ai_mem = p_data.get("ai_memory") if p_data else None
+                                
+                                update_msgs = []
+                                if p_data and ai_mem:
+                                    for handler, value in updates:
+                                        handler(p_data, ai_mem, value, update_msgs)
+                            
+                            # 업데이트 메시지는 아래 알림 메시지에 합쳐서 출력
+                            if update_msgs:
+                                update_summary = " | ".join(update_msgs)
+                    
+                    except json.JSONDecodeError as je:
+                        logging.warning(f"[SYSTEM_UPDATE] JSON 파싱 실패:  {je}")
+                    except Exception as ue:
+                        logging.warning(f"[SYSTEM_UPDATE] 업데이트 실패: {ue}")
+                    
+                    # 응답에서 system_update 블록 제거 (출력에서 숨김, 매치 위치로 잘라 재탐색 없음)
+                    before = response[:system_update_match.start()].rstrip()
+                    after = response[system_update_match.end():].lstrip()
+                    response = f"{before}\n\n{after}".strip() if after else before
+            
+            # 응답 길이 로깅
+            if response: 
+                logging.info("[Response] Length: %d자", len(response))
+            
+            # 결과 전송: OOC 적용/상태 변화/시스템 액션/AI 메모리 갱신 알림은 한 메시지로 묶음
+            notices = [ooc_notice] if ooc_notice else []
+            if update_summary:
+                notices.append(update_summary)
+            if auto_msg:
+                notices.append(f"🤖 {auto_msg}")
             if memory_msgs:
-                for mem_msg in memory_msgs: 
-                    await message.channel.send(mem_msg)
+                notices.extend(memory_msgs)
+            if notices:
+                await send_long_message(message.channel, "\n".join(notices))
             
             if response:
                 await send_long_message(message. channel, response)
                 domain_manager.append_history(channel_id, "User", action_text)
                 domain_manager.append_history(channel_id, "Char", response)
                 
-                # === 자동 발효 시스템 (장기 기억 관리) ===
-                try:
-                    session_data = domain_manager.get_domain(channel_id)
-                    fermentation. ensure_memory_fields(session_data)
-                    
-                    # 발효 필요 여부 체크 및 실행 - 수정: client_genai 사용
-                    if fermentation.should_ferment_fresh(session_data):
-                        logging.info(f"[Fermentation] 자동 발효 시작 - {channel_id}")
-                        await fermentation.auto_ferment(
-                            client_genai, MODEL_ID, session_data,
-                            save_callback=lambda: domain_manager.save_domain(channel_id, session_data)
-                        )
-                except Exception as fe:
-                    logging.warning(f"[Fermentation] 자동 발효 실패 (무시됨): {fe}")
+                # === 자동 발효 시스템 (장기 기억 관리, 백그라운드) ===
+                _schedule_ferment(channel_id)
     
     except Exception as e: 
         logging.error(f"Error:  {e}", exc_info=True)
@@ -1716,6 +2260,12 @@ Track each player separately.  3rd person narration.  Korean output."""
 # =========================================================
 if __name__ == "__main__":
     if DISCORD_TOKEN:
+        if uvloop:
+            uvloop.install()
+            logging.info("[Loop] uvloop 이벤트 루프 사용")
         client_discord. run(DISCORD_TOKEN)
+        
+        # 종료 시 아직 저장되지 않은 히스토리 버퍼 저장
+        domain_manager.flush_all_history()
     else:
         print("ERROR: DISCORD_TOKEN이 설정되지 않았습니다.")
\ No newline at end of file
@@ -42,14 +42,22 @@ import json
 import asyncio
 import logging
 import re
+from functools import lru_cache
 from typing import Optional, Dict, Any, List, Callable, TypeVar, Tuple
 from google.genai import types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # =========================================================
 # 상수 정의
 # =========================================================
 MAX_RETRY_COUNT = 3
 RETRY_DELAY_SECONDS = 1
+ACCEPTED_GENRE_CONFIDENCE = frozenset({"high", "medium"})  # AI 장르 분석을 그대로 채택하는 신뢰도
+JSON_START_PATTERN = re.compile(r"[{\[]")  # AI 응답에서 JSON 객체/리스트 시작점
 
 # =========================================================
 # WORLD CONSTRAINTS EXTRACTION (세계 제약 추출)
@@ -362,29 +370,20 @@ def safe_parse_json(text: Optional[str]) -> Dict[str, Any]:
         cleaned_text = cleaned_text.strip("`")
         
         # JSON 시작점 찾기 ({ 또는 [)
-        start_idx = -1
-        for i, char in enumerate(cleaned_text):
-            if char in ['{', '[']:
-                start_idx = i
-                break
-        
-        if start_idx == -1:
+        start_match = JSON_START_PATTERN.search(cleaned_text)
+        if not start_match:
             return {}
+        start_idx = start_match.start()
         
         # 대응하는 종료점 찾기
         target_end = '}' if cleaned_text[start_idx] == '{' else ']'
-        end_idx = -1
-        
-        for i in range(len(cleaned_text) - 1, start_idx, -1):
-            if cleaned_text[i] == target_end:
-                end_idx = i + 1
-                break
-        
-        if end_idx == -1:
+        end_idx = cleaned_text.rfind(target_end, start_idx + 1) + 1
+        if not end_idx:
             return {}
         
         json_str = cleaned_text[start_idx:end_idx]
-        data = json.loads(json_str)
+        # orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스이므로 아래 처리 그대로 적용
+        data = orjson.loads(json_str) if orjson else json.loads(json_str)
         
         # 리스트인 경우 첫 번째 딕셔너리 요소 반환
         if isinstance(data, list):
@@ -405,6 +404,28 @@ def safe_parse_json(text: Optional[str]) -> Dict[str, Any]:
         return {}
 
 
+# =========================================================
+# [HELPER] 생성 설정 레지스트리
+# =========================================================
+@lru_cache(maxsize=32)
+def get_generation_config(
+    temperature: float,
+    json_output: bool = False,
+    system_instruction: Optional[str] = None
+) -> types.GenerateContentConfig:
+    """
+    (온도, JSON 출력 여부, 시스템 지시문) 조합별 생성 설정을 한 번만 만들어 재사용합니다.
+    
+    좌뇌 분석은 매 메시지 호출되지만 설정 조합은 몇 가지뿐이므로 호출마다 새로 만들 필요가 없습니다.
+    반환된 설정은 공유되므로 수정하지 마세요.
+    """
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        response_mime_type="application/json" if json_output else None,
+        temperature=temperature
+    )
+
+
 # =========================================================
 # [HELPER] API 호출 재시도 래퍼
 # =========================================================
@@ -502,7 +523,7 @@ async def compress_lore_core(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(temperature=0.2)
+    config = get_generation_config(0.2)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -608,7 +629,7 @@ async def compress_chunk(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(temperature=0.1)
+    config = get_generation_config(0.1)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -660,7 +681,7 @@ async def merge_chunk_summaries(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(temperature=0.2)
+    config = get_generation_config(0.2)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -782,6 +803,172 @@ async def process_massive_lore(
 # =========================================================
 # [LOGIC ANALYZER] 상황 판단 및 인과율 계산
 # =========================================================
+# 좌뇌 시스템 지시문 (입력과 무관하게 고정 - 매 호출 같은 접두부로 보내 모델 측 암시적 캐싱이 적용되도록)
+NVC_SYSTEM_INSTRUCTION = (
+    "[THEORIA LEFT HEMISPHERE - Logic Core]\n"
+    "You are the analytical component of the THEORIA system.\n"
+    "Your role: Extract OBJECTIVE FACTS from the narrative context.\n\n"
+    
+    "### CORE PRINCIPLES (From World Axiom)\n"
+    "1. **MACROSCOPIC ONLY:** Analyze observable phenomena ONLY.\n"
+    "   - ✅ Actions, speech, physical states, environmental changes\n"
+    "   - ❌ Inner thoughts, emotions, intentions (these are Microscopic)\n"
+    "2. **CAUSALITY BOUND:** Apply physics and logic strictly.\n"
+    "3. **ASYNCHRONOUS WORLD:** Consider what NPCs might be doing concurrently.\n\n"
+    
+    f"{COGNITIVE_ARCHITECTURE_MODEL}\n\n"
+    
+    f"{STATE_TRACKING_FORMAT}\n\n"
+    
+    f"{TEMPORAL_ORIENTATION_PROTOCOL}\n\n"
+    
+    "### OBSERVATION PROTOCOLS\n"
+    "1. **Physics Check (Hard Limits):** Verify physical/logical possibility. "
+    "If impossible, state: **'Action Failed: Physics Violation'**.\n"
+    "2. **Knowledge Firewall:** Distinguish Player Knowledge vs Character Knowledge.\n"
+    "3. **Causal Integrity:** Verify causes existed BEFORE effects.\n"
+    "4. **Experience Recognition:** Note significant achievements, repeated experiences, and growth moments.\n\n"
+
+    "### SYSTEM ACTION RULES (자동 퀘스트/메모/NPC 관리)\n"
+    "SystemAction triggers automatically based on narrative events.\n\n"
+    
+    "**Quest Actions:**\n"
+    "- `{\"tool\": \"Quest\", \"type\": \"Add\", \"content\": \"퀘스트 내용\"}` — When NPC gives mission, player discovers objective\n"
+    "- `{\"tool\": \"Quest\", \"type\": \"Complete\", \"content\": \"기존 퀘스트의 일부 텍스트\"}` — When objective achieved, mission accomplished\n\n"
+    
+    "**Memo Actions:**\n"
+    "- `{\"tool\": \"Memo\", \"type\": \"Add\", \"content\": \"메모 내용\"}` — Important info: clues, NPC names, codes, locations, items acquired\n"
+    "- `{\"tool\": \"Memo\", \"type\": \"Archive\", \"content\": \"기존 메모의 일부 텍스트\"}` — When memo becomes obsolete (item used, info no longer relevant)\n\n"
+    
+    "**NPC Actions:**\n"
+    "- `{\"tool\": \"NPC\", \"type\": \"Add\", \"content\": \"이름: 설명\"}` — When new named NPC introduced\n\n"
+    
+    "**Examples:**\n"
+    "- Player receives letter with mission → Quest Add\n"
+    "- Player defeats boss mentioned in quest → Quest Complete\n"
+    "- Player finds password \"1234\" → Memo Add\n"
+    "- Player uses the password successfully → Memo Archive\n"
+    "- Player meets \"철수\" the blacksmith → NPC Add\n\n"
+    
+    "**IMPORTANT:** Return `null` if no action needed. Don't force actions.\n\n"
+
+    "### NPC INTERACTION SYSTEM\n"
+    "Analyze NPCs present in the scene and their attitudes toward players.\n\n"
+    
+    "**NPCAttitudes:** For each NPC interacting with players, determine attitude based on context:\n"
+    "- `hostile`: Aggressive, threatening, may lie or attack\n"
+    "- `unfriendly`: Cold, short answers, uncooperative\n"
+    "- `neutral`: Polite, businesslike, will trade\n"
+    "- `friendly`: Warm, helpful, shares information\n"
+    "- `devoted`: Loyal, shares secrets, willing to sacrifice\n\n"
+    
+    "**NPCInteraction:** When 2+ NPCs are present, suggest ambient dialogue between them:\n"
+    "- Tavern scene: NPCs gossiping, arguing, flirting\n"
+    "- Market: Merchants competing, customers complaining\n"
+    "- Combat aftermath: NPCs reacting to events\n"
+    "- Set to `null` if no NPC interaction is appropriate.\n\n"
+
+    "### OUTPUT FORMAT (JSON ONLY)\n"
+    "{\n"
+    '  "CurrentLocation": "Location Name",\n'
+    '  "LocationRisk": "None/Low/Medium/High/Extreme",\n'
+    '  "TimeContext": "Time of day/flow",\n'
+    '  "PhysicalState": "Inferred Polyvagal state from observable behavior",\n'
+    '  "Observation": "Objective summary of MACROSCOPIC states only.",\n'
+    '  "TemporalOrientation": {\n'
+    '    "continuity_from_previous": "What carries over from last turn",\n'
+    '    "active_threads": ["Unresolved thread 1", "Thread 2"],\n'
+    '    "offscreen_npcs": ["NPC doing X elsewhere"],\n'
+    '    "suggested_focus": "What the Right Hemisphere should emphasize"\n'
+    '  },\n'
+    '  "NPCAttitudes": {\n'
+    '    "NPC이름": {"attitude": "hostile/unfriendly/neutral/friendly/devoted", "reason": "why"},\n'
+    '    "...": {...}\n'
+    '  },\n'
+    '  "NPCInteraction": {\n'
+    '    "participants": ["NPC1", "NPC2"],\n'
+    '    "type": "gossip/argument/flirt/business/reaction",\n'
+    '    "topic": "What they might discuss",\n'
+    '    "mood": "tense/casual/heated/secretive"\n'
+    '  } OR null,\n'
+    '  "AbnormalElements": ["드래곤", "마법", "고백"] OR [],\n'
+    '  "ExperienceCounters": {"독중독": 1, "백병전": 1} OR {},\n'
+    '  "Need": "Logical next step for Right Hemisphere",\n'
+    '  "SystemAction": { "tool": "Quest/Memo/NPC", "type": "Add/Complete/Archive", "content": "..." } OR null,\n'
+    '  "PlayerUpdate": {\n'
+    '    "inventory_add": {"아이템이름": 수량} OR null,\n'
+    '    "inventory_remove": {"아이템이름": 수량} OR null,\n'
+    '    "gold_change": +100 OR -50 OR null,\n'
+    '    "status_add": ["중독", "피로"] OR null,\n'
+    '    "status_remove": ["출혈"] OR null\n'
+    '  } OR null\n'
+    "}\n"
+    "\n"
+    "### PLAYER UPDATE SYSTEM (자동 인벤토리/골드/상태이상 관리)\n"
+    "PlayerUpdate triggers automatically based on narrative events.\n\n"
+    
+    "**When to update:**\n"
+    "- Player picks up item → inventory_add\n"
+    "- Player uses/loses item → inventory_remove\n"
+    "- Player receives payment/reward → gold_change: +amount\n"
+    "- Player pays/loses money → gold_change: -amount\n"
+    "- Player gets poisoned/injured/cursed → status_add\n"
+    "- Player heals/recovers/cured → status_remove\n\n"
+    
+    "**Examples:**\n"
+    "- Player finds a sword → inventory_add: {\"검\": 1}\n"
+    "- Player drinks potion → inventory_remove: {\"포션\": 1}\n"
+    "- Player sells item for 50 gold → gold_change: 50\n"
+    "- Player gets bitten by snake → status_add: [\"중독\"]\n"
+    "- Player rests at inn → status_remove: [\"피로\"]\n\n"
+    
+    "**IMPORTANT:** Return null if no update needed. Don't force updates.\n\n"
+
+    "### ABNORMAL ELEMENTS & EXPERIENCE DETECTION\n"
+    "**AbnormalElements:** List any supernatural, unusual, or extraordinary elements in the scene.\n"
+    "Examples: 드래곤, 마법, 귀신, 상태창, 이세계, 몬스터, 초능력, 고백, 결투, 납치\n\n"
+    "**ExperienceCounters:** Detect significant experiences that contribute to character growth.\n"
+    "Use descriptive names based on what actually happened:\n"
+    "- Physical trials: 독중독, 화상, 동상, 낙하, 기절, 굶주림 등\n"
+    "- Combat experiences: 백병전, 암살시도, 포위당함 등\n"
+    "- Social/emotional: 배신당함, 거절당함, 협박당함, 죽을고비 등\n"
+    "- Supernatural: 마법피격, 드래곤조우, 귀신목격, 차원이동 등\n"
+    "Only count if it ACTUALLY HAPPENED to the player character.\n"
+    "\n"
+    "### PASSIVE SUGGESTION SYSTEM (AI-DRIVEN)\n"
+    "Analyze the player's cumulative experiences and suggest a NEW passive/title if warranted.\n\n"
+    
+    "**When to suggest a passive:**\n"
+    "- Repeated similar experiences (5+ times): 독에 자주 중독 → [독 내성]\n"
+    "- Significant relationship milestone: 엘프와 10+ 우호 상호작용 → [엘프의 친구]\n"
+    "- Survival of extreme situation: 죽을 고비 3회 → [구사일생]\n"
+    "- Unique achievement: 드래곤 처치 → [용 사냥꾼]\n"
+    "- Behavioral pattern: 항상 협상 선택 → [외교관의 혀]\n"
+    "- World-specific adaptation: 던전 50층 돌파 → [심연의 주민]\n\n"
+    
+    "**Passive structure:**\n"
+    "- name: Creative Korean title (e.g., '엘프의 친구', '불굴의 정신')\n"
+    "- trigger: What earned this (e.g., '엘프와 우호적 상호작용 10회')\n"
+    "- effect: Concrete in-world effect (e.g., '엘프에게 호감도 보너스, 엘프어 기초 이해')\n"
+    "- category: 생존/전투/사회/초자연/지식/기타\n\n"
+    
+    "**Rules:**\n"
+    "- Only suggest if TRULY earned through gameplay, not arbitrary\n"
+    "- Be creative but grounded in what actually happened\n"
+    "- Don't repeat passives player already has (check context)\n"
+    "- Suggest at most 1 passive per analysis\n"
+    "- Set to null if no passive is warranted\n\n"
+    
+    '  "PassiveSuggestion": {\n'
+    '    "name": "패시브/칭호 이름",\n'
+    '    "trigger": "획득 조건 설명",\n'
+    '    "effect": "구체적 효과",\n'
+    '    "category": "카테고리",\n'
+    '    "reasoning": "왜 이 패시브를 제안하는지 간단 설명"\n'
+    '  } OR null,\n'
+)
+
+
 async def analyze_context_nvc(
     client,
     model_id: str,
@@ -807,170 +994,6 @@ async def analyze_context_nvc(
     Returns:
         분석 결과 딕셔너리
     """
-    system_instruction = (
-        "[THEORIA LEFT HEMISPHERE - Logic Core]\n"
-        "You are the analytical component of the THEORIA system.\n"
-        "Your role: Extract OBJECTIVE FACTS from the narrative context.\n\n"
-        
-        "### CORE PRINCIPLES (From World Axiom)\n"
-        "1. **MACROSCOPIC ONLY:** Analyze observable phenomena ONLY.\n"
-        "   - ✅ Actions, speech, physical states, environmental changes\n"
-        "   - ❌ Inner thoughts, emotions, intentions (these are Microscopic)\n"
-        "2. **CAUSALITY BOUND:** Apply physics and logic strictly.\n"
-        "3. **ASYNCHRONOUS WORLD:** Consider what NPCs might be doing concurrently.\n\n"
-        
-        f"{COGNITIVE_ARCHITECTURE_MODEL}\n\n"
-        
-        f"{STATE_TRACKING_FORMAT}\n\n"
-        
-        f"{TEMPORAL_ORIENTATION_PROTOCOL}\n\n"
-        
-        "### OBSERVATION PROTOCOLS\n"
-        "1. **Physics Check (Hard Limits):** Verify physical/logical possibility. "
-        "If impossible, state: **'Action Failed: Physics Violation'**.\n"
-        "2. **Knowledge Firewall:** Distinguish Player Knowledge vs Character Knowledge.\n"
-        "3. **Causal Integrity:** Verify causes existed BEFORE effects.\n"
-        "4. **Experience Recognition:** Note significant achievements, repeated experiences, and growth moments.\n\n"
-
-        "### SYSTEM ACTION RULES (자동 퀘스트/메모/NPC 관리)\n"
-        "SystemAction triggers automatically based on narrative events.\n\n"
-        
-        "**Quest Actions:**\n"
-        "- `{\"tool\": \"Quest\", \"type\": \"Add\", \"content\": \"퀘스트 내용\"}` — When NPC gives mission, player discovers objective\n"
-        "- `{\"tool\": \"Quest\", \"type\": \"Complete\", \"content\": \"기존 퀘스트의 일부 텍스트\"}` — When objective achieved, mission accomplished\n\n"
-        
-        "**Memo Actions:**\n"
-        "- `{\"tool\": \"Memo\", \"type\": \"Add\", \"content\": \"메모 내용\"}` — Important info: clues, NPC names, codes, locations, items acquired\n"
-        "- `{\"tool\": \"Memo\", \"type\": \"Archive\", \"content\": \"기존 메모의 일부 텍스트\"}` — When memo becomes obsolete (item used, info no longer relevant)\n\n"
-        
-        "**NPC Actions:**\n"
-        "- `{\"tool\": \"NPC\", \"type\": \"Add\", \"content\": \"이름: 설명\"}` — When new named NPC introduced\n\n"
-        
-        "**Examples:**\n"
-        "- Player receives letter with mission → Quest Add\n"
-        "- Player defeats boss mentioned in quest → Quest Complete\n"
-        "- Player finds password \"1234\" → Memo Add\n"
-        "- Player uses the password successfully → Memo Archive\n"
-        "- Player meets \"철수\" the blacksmith → NPC Add\n\n"
-        
-        "**IMPORTANT:** Return `null` if no action needed. Don't force actions.\n\n"
-
-        "### NPC INTERACTION SYSTEM\n"
-        "Analyze NPCs present in the scene and their attitudes toward players.\n\n"
-        
-        "**NPCAttitudes:** For each NPC interacting with players, determine attitude based on context:\n"
-        "- `hostile`: Aggressive, threatening, may lie or attack\n"
-        "- `unfriendly`: Cold, short answers, uncooperative\n"
-        "- `neutral`: Polite, businesslike, will trade\n"
-        "- `friendly`: Warm, helpful, shares information\n"
-        "- `devoted`: Loyal, shares secrets, willing to sacrifice\n\n"
-        
-        "**NPCInteraction:** When 2+ NPCs are present, suggest ambient dialogue between them:\n"
-        "- Tavern scene: NPCs gossiping, arguing, flirting\n"
-        "- Market: Merchants competing, customers complaining\n"
-        "- Combat aftermath: NPCs reacting to events\n"
-        "- Set to `null` if no NPC interaction is appropriate.\n\n"
-
-        "### OUTPUT FORMAT (JSON ONLY)\n"
-        "{\n"
-        '  "CurrentLocation": "Location Name",\n'
-        '  "LocationRisk": "None/Low/Medium/High/Extreme",\n'
-        '  "TimeContext": "Time of day/flow",\n'
-        '  "PhysicalState": "Inferred Polyvagal state from observable behavior",\n'
-        '  "Observation": "Objective summary of MACROSCOPIC states only.",\n'
-        '  "TemporalOrientation": {\n'
-        '    "continuity_from_previous": "What carries over from last turn",\n'
-        '    "active_threads": ["Unresolved thread 1", "Thread 2"],\n'
-        '    "offscreen_npcs": ["NPC doing X elsewhere"],\n'
-        '    "suggested_focus": "What the Right Hemisphere should emphasize"\n'
-        '  },\n'
-        '  "NPCAttitudes": {\n'
-        '    "NPC이름": {"attitude": "hostile/unfriendly/neutral/friendly/devoted", "reason": "why"},\n'
-        '    "...": {...}\n'
-        '  },\n'
-        '  "NPCInteraction": {\n'
-        '    "participants": ["NPC1", "NPC2"],\n'
-        '    "type": "gossip/argument/flirt/business/reaction",\n'
-        '    "topic": "What they might discuss",\n'
-        '    "mood": "tense/casual/heated/secretive"\n'
-        '  } OR null,\n'
-        '  "AbnormalElements": ["드래곤", "마법", "고백"] OR [],\n'
-        '  "ExperienceCounters": {"독중독": 1, "백병전": 1} OR {},\n'
-        '  "Need": "Logical next step for Right Hemisphere",\n'
-        '  "SystemAction": { "tool": "Quest/Memo/NPC", "type": "Add/Complete/Archive", "content": "..." } OR null,\n'
-        '  "PlayerUpdate": {\n'
-        '    "inventory_add": {"아이템이름": 수량} OR null,\n'
-        '    "inventory_remove": {"아이템이름": 수량} OR null,\n'
-        '    "gold_change": +100 OR -50 OR null,\n'
-        '    "status_add": ["중독", "피로"] OR null,\n'
-        '    "status_remove": ["출혈"] OR null\n'
-        '  } OR null\n'
-        "}\n"
-        "\n"
-        "### PLAYER UPDATE SYSTEM (자동 인벤토리/골드/상태이상 관리)\n"
-        "PlayerUpdate triggers automatically based on narrative events.\n\n"
-        
-        "**When to update:**\n"
-        "- Player picks up item → inventory_add\n"
-        "- Player uses/loses item → inventory_remove\n"
-        "- Player receives payment/reward → gold_change: +amount\n"
-        "- Player pays/loses money → gold_change: -amount\n"
-        "- Player gets poisoned/injured/cursed → status_add\n"
-        "- Player heals/recovers/cured → status_remove\n\n"
-        
-        "**Examples:**\n"
-        "- Player finds a sword → inventory_add: {\"검\": 1}\n"
-        "- Player drinks potion → inventory_remove: {\"포션\": 1}\n"
-        "- Player sells item for 50 gold → gold_change: 50\n"
-        "- Player gets bitten by snake → status_add: [\"중독\"]\n"
-        "- Player rests at inn → status_remove: [\"피로\"]\n\n"
-        
-        "**IMPORTANT:** Return null if no update needed. Don't force updates.\n\n"
-
-        "### ABNORMAL ELEMENTS & EXPERIENCE DETECTION\n"
-        "**AbnormalElements:** List any supernatural, unusual, or extraordinary elements in the scene.\n"
-        "Examples: 드래곤, 마법, 귀신, 상태창, 이세계, 몬스터, 초능력, 고백, 결투, 납치\n\n"
-        "**ExperienceCounters:** Detect significant experiences that contribute to character growth.\n"
-        "Use descriptive names based on what actually happened:\n"
-        "- Physical trials: 독중독, 화상, 동상, 낙하, 기절, 굶주림 등\n"
-        "- Combat experiences: 백병전, 암살시도, 포위당함 등\n"
-        "- Social/emotional: 배신당함, 거절당함, 협박당함, 죽을고비 등\n"
-        "- Supernatural: 마법피격, 드래곤조우, 귀신목격, 차원이동 등\n"
-        "Only count if it ACTUALLY HAPPENED to the player character.\n"
-        "\n"
-        "### PASSIVE SUGGESTION SYSTEM (AI-DRIVEN)\n"
-        "Analyze the player's cumulative experiences and suggest a NEW passive/title if warranted.\n\n"
-        
-        "**When to suggest a passive:**\n"
-        "- Repeated similar experiences (5+ times): 독에 자주 중독 → [독 내성]\n"
-        "- Significant relationship milestone: 엘프와 10+ 우호 상호작용 → [엘프의 친구]\n"
-        "- Survival of extreme situation: 죽을 고비 3회 → [구사일생]\n"
-        "- Unique achievement: 드래곤 처치 → [용 사냥꾼]\n"
-        "- Behavioral pattern: 항상 협상 선택 → [외교관의 혀]\n"
-        "- World-specific adaptation: 던전 50층 돌파 → [심연의 주민]\n\n"
-        
-        "**Passive structure:**\n"
-        "- name: Creative Korean title (e.g., '엘프의 친구', '불굴의 정신')\n"
-        "- trigger: What earned this (e.g., '엘프와 우호적 상호작용 10회')\n"
-        "- effect: Concrete in-world effect (e.g., '엘프에게 호감도 보너스, 엘프어 기초 이해')\n"
-        "- category: 생존/전투/사회/초자연/지식/기타\n\n"
-        
-        "**Rules:**\n"
-        "- Only suggest if TRULY earned through gameplay, not arbitrary\n"
-        "- Be creative but grounded in what actually happened\n"
-        "- Don't repeat passives player already has (check context)\n"
-        "- Suggest at most 1 passive per analysis\n"
-        "- Set to null if no passive is warranted\n\n"
-        
-        '  "PassiveSuggestion": {\n'
-        '    "name": "패시브/칭호 이름",\n'
-        '    "trigger": "획득 조건 설명",\n'
-        '    "effect": "구체적 효과",\n'
-        '    "category": "카테고리",\n'
-        '    "reasoning": "왜 이 패시브를 제안하는지 간단 설명"\n'
-        '  } OR null,\n'
-    )
-
     # player_context가 있으면 추가 (중복 패시브 방지용)
     player_info = ""
     if player_context:
@@ -989,9 +1012,8 @@ async def analyze_context_nvc(
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
     
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.2  # 약간의 창의성 허용
+    config = get_generation_config(  # 약간의 창의성 허용
+        0.2, json_output=True, system_instruction=NVC_SYSTEM_INSTRUCTION
     )
     
     result = await api_call_with_retry(
@@ -1114,11 +1136,7 @@ async def analyze_genre_from_lore(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        temperature=0.3
-    )
+    config = get_generation_config(0.3, json_output=True, system_instruction=system_instruction)
     
     for attempt in range(MAX_RETRY_COUNT):
         try:
@@ -1135,7 +1153,7 @@ async def analyze_genre_from_lore(
                 ai_confidence = data.get("confidence", "medium")
                 
                 # AI가 명확히 판단했으면 (1-3개 장르 + 높은 신뢰도)
-                if ai_genres and len(ai_genres) <= 3 and ai_confidence in ["high", "medium"]:
+                if ai_genres and len(ai_genres) <= 3 and ai_confidence in ACCEPTED_GENRE_CONFIDENCE:
                     logging.info(
                         f"[Genre Analysis] AI 분석 성공: {ai_genres} (신뢰도: {ai_confidence})"
                     )
@@ -1199,10 +1217,7 @@ async def analyze_npcs_from_lore(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.3
-    )
+    config = get_generation_config(0.3, json_output=True)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1256,10 +1271,7 @@ async def analyze_location_rules_from_lore(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.3
-    )
+    config = get_generation_config(0.3, json_output=True)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1360,10 +1372,7 @@ async def analyze_brainstorming(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.5  # 창의적 분석을 위해 약간 높은 온도
-    )
+    config = get_generation_config(0.5, json_output=True)  # 창의적 분석을 위해 약간 높은 온도
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1434,10 +1443,7 @@ async def check_narrative_consistency(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.1
-    )
+    config = get_generation_config(0.1, json_output=True)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1484,10 +1490,7 @@ async def extract_world_constraints(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        response_mime_type="application/json",
-        temperature=0.2
-    )
+    config = get_generation_config(0.2, json_output=True)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1604,11 +1607,7 @@ async def process_ooc_memory_update(
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
     
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        temperature=0.1
-    )
+    config = get_generation_config(0.1, json_output=True, system_instruction=system_instruction)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1687,11 +1686,7 @@ async def auto_update_ai_memory(
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
     
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        temperature=0.1
-    )
+    config = get_generation_config(0.1, json_output=True, system_instruction=system_instruction)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -1807,11 +1802,7 @@ async def process_ooc_memory_edit(
     contents = [
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        temperature=0.1
-    )
+    config = get_generation_config(0.1, json_output=True, system_instruction=system_instruction)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -2262,11 +2253,7 @@ async def auto_update_session_memory(
         types.Content(role="user", parts=[types.Part(text=user_prompt)])
     ]
     
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        temperature=0.1
-    )
+    config = get_generation_config(0.1, json_output=True, system_instruction=system_instruction)
     
     result = await api_call_with_retry(
         client, model_id, contents, config,
@@ -26,7 +26,7 @@ Prompt Order (SillyTavern Preset Style):
 import asyncio
 import logging
 import re
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator, Callable, Awaitable
 from google import genai
 from google.genai import types
 
@@ -391,6 +391,21 @@ The AI is a **witness**, not a puppeteer of ANY player character.
 """
 
 
+# =========================================================
+# [12] OUTPUT GENERATION REQUEST (출력 지시)
+# 매 턴 동일하므로 시스템 프롬프트 끝에 두어 캐시 접두사에 포함
+# =========================================================
+OUTPUT_DIRECTIVE = """### [OUTPUT DIRECTIVE]
+Process <material> as the player's attempt. 
+Players are identified by [Name]:  prefix (e.g., [잭]: , [리사]:).
+Generate NPC reactions and world response ONLY.
+**Apply NPC attitudes to their speech and behavior.**
+**If NPC Interaction is suggested, include their ambient dialogue.**
+**CRITICAL: Reference the FERMENTED/DEEP MEMORY above for story continuity.**
+Do NOT generate ANY player's dialogue, thoughts, or decisions.
+Track each player separately.  3rd person narration.  Korean output."""
+
+
 # =========================================================
 # [8] SCRIPTS - 작노/글노 (장르/톤 기반 동적 생성)
 # 프롬프트 순서 8번
@@ -599,6 +614,15 @@ class ChatSessionAdapter:
                 )
                 self.history.append(model_content)
             
+            # 캐시 적중 확인용 (캐시된 토큰 수)
+            if self.config.cached_content and logging.getLogger().isEnabledFor(logging.DEBUG):
+                usage = getattr(response, "usage_metadata", None)
+                logging.debug(
+                    f"[Caching] cached tokens: "
+                    f"{getattr(usage, 'cached_content_token_count', None)} / "
+                    f"prompt tokens: {getattr(usage, 'prompt_token_count', None)}"
+                )
+            
             return response
             
         except Exception as e:
@@ -606,6 +630,51 @@ class ChatSessionAdapter:
             if self.history and self.history[-1].role == "user":
                 self.history.pop()
             raise
+    
+    async def send_message_stream(self, content: str) -> AsyncIterator[str]:
+        """
+        메시지를 전송하고 응답 텍스트를 조각 단위로 스트리밍합니다.
+        
+        스트림이 끝나면 전체 응답을 히스토리에 추가합니다.
+        """
+        self.history.append(
+            types.Content(role="user", parts=[types.Part(text=content)])
+        )
+        
+        chunks = []
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=self.history,
+                config=self.config
+            )
+            
+            usage = None
+            async for chunk in stream:
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+            
+        except Exception as e:
+            logging.error(f"ChatSession.send_message_stream 오류: {e}")
+            if self.history and self.history[-1].role == "user":
+                self.history.pop()
+            raise
+        
+        if chunks:
+            self.history.append(
+                types.Content(role="model", parts=[types.Part(text="".join(chunks))])
+            )
+        
+        # 캐시 적중 확인용 (캐시된 토큰 수)
+        if self.config.cached_content and logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"[Caching] cached tokens: "
+                f"{getattr(usage, 'cached_content_token_count', None)} / "
+                f"prompt tokens: {getattr(usage, 'prompt_token_count', None)}"
+            )
 
 
 # =========================================================
@@ -862,6 +931,9 @@ This tone affects style, not physics or causality.
         if 'immediate' in self.sections:
             parts.append(self.sections['immediate'])
         
+        # [12] Output Directive (매 턴 동일 - 캐시 접두사에 포함)
+        parts.append(OUTPUT_DIRECTIVE)
+        
         return "\n\n".join(filter(None, parts))
     
     def build_dynamic_prompt(self) -> str:
@@ -995,16 +1067,22 @@ Recording in Korean. Awaiting observable events.
 # =========================================================
 # 응답 생성 (재시도 포함)
 # =========================================================
-async def generate_response_with_retry(
+async def generate_response_stream_with_retry(
     client,
     chat_session: ChatSessionAdapter,
-    user_input: str
-) -> str:
+    user_input: str,
+    on_progress: Optional[Callable[[Callable[[], str]], Awaitable[None]]] = None,
+    should_abort: Optional[Callable[[], bool]] = None
+) -> Optional[str]:
     """
-    재시도 로직을 포함하여 응답을 생성합니다.
+    재시도 로직을 포함하여 응답을 스트리밍으로 생성합니다.
+    
+    Args:
+        on_progress: 조각이 도착할 때마다 호출되는 콜백. 현재 시도의 누적 텍스트를
+            만드는 함수를 받으므로, 실제로 표시할 때만 호출하면 됨 (조각마다 합치지 않음)
+        should_abort: 조각마다 확인하여 True이면 생성을 중단하고 None을 반환
     """
     min_length = DEFAULT_MIN_RESPONSE_LENGTH
-    max_length = DEFAULT_MAX_RESPONSE_LENGTH
     
     length_instruction = build_length_instruction()
     
@@ -1020,14 +1098,22 @@ async def generate_response_with_retry(
     
     for attempt in range(MAX_RETRY_COUNT):
         try:
-            response = await chat_session.send_message(full_input)
+            parts = []
+            current_text = lambda: "".join(parts)
+            async for delta in chat_session.send_message_stream(full_input):
+                if should_abort and should_abort():
+                    logging.info("[Stream] 중단 요청으로 응답 생성 중지")
+                    return None
+                parts.append(delta)
+                if on_progress:
+                    await on_progress(current_text)
             
-            if response and response.text:
-                response_text = response.text
+            response_text = "".join(parts)
+            if response_text:
                 response_length = len(response_text)
                 
                 if response_length >= min_length:
-                    logging.info(f"[Length] OK: {response_length}자")
+                    logging.info("[Length] OK: %d자", response_length)
                     return response_text
                 else:
                     logging.warning(
@@ -1113,7 +1199,7 @@ async def create_cached_session(
             logging.warning(f"[Caching] 캐시 생성 실패, 일반 세션 사용: {e}")
     
     if cache_name:
-        logging.info(f"[Caching] 캐시 세션 생성 - {channel_id}")
+        logging.info("[Caching] 캐시 세션 생성 - %s", channel_id)
         
         config = types.GenerateContentConfig(
             temperature=DEFAULT_TEMPERATURE,
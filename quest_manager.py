@@ -13,6 +13,11 @@ from typing import Optional, Dict, Any, List, Tuple
 import domain_manager
 from google.genai import types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # =========================================================
 # 상수 정의
 # =========================================================
@@ -20,6 +25,7 @@ MAX_RETRY_COUNT = 3
 RETRY_DELAY_SECONDS = 1
 MAX_ARCHIVE_DISPLAY = 3  # 보관함에서 표시할 최대 항목 수
 MAX_HISTORY_FOR_CHRONICLE = 50  # 연대기 생성 시 사용할 최대 히스토리
+FULL_EXPORT_MODES = frozenset({"전체", "full", "all"})  # 전체 내보내기 모드 별칭
 
 
 # =========================================================
@@ -66,7 +72,7 @@ async def call_gemini_api(
                 # JSON 파싱
                 clean_text = re.sub(r"```(json)?", "", response.text).strip()
                 clean_text = clean_text.strip("`")
-                return json.loads(clean_text)
+                return orjson.loads(clean_text) if orjson else json.loads(clean_text)
                 
         except json.JSONDecodeError as e:
             logging.warning(f"[Quest API] JSON 파싱 실패 (시도 {attempt + 1}/{MAX_RETRY_COUNT}): {e}")
@@ -82,11 +88,14 @@ async def call_gemini_api(
 # =========================================================
 # 컨텍스트 생성 (Context Generation)
 # =========================================================
-def get_objective_context(channel_id: str) -> str:
+def get_objective_context(channel_id: str, board: Optional[Dict[str, Any]] = None) -> str:
     """
     현재 퀘스트와 메모 상태를 AI가 읽기 좋은 텍스트로 변환합니다.
+    
+    board가 주어지면 다시 로드하지 않고 사용합니다.
     """
-    board = domain_manager.get_quest_board(channel_id)
+    if board is None:
+        board = domain_manager.get_quest_board(channel_id)
     if not board:
         return "No active quests or memos."
     
@@ -434,8 +443,7 @@ async def generate_character_info_view(
         inv_text = "(빈 인벤토리)"
     
     # 히스토리 텍스트
-    history_logs = domain_manager.get_domain(channel_id).get('history', [])[-20:]
-    history_text = "\n".join([f"{h['role']}: {h['content']}" for h in history_logs])
+    history_text = domain_manager.get_history_text(channel_id, 20)
     
     system_prompt = (
         "You are a UI Generator for a TRPG status window.\n"
@@ -464,11 +472,8 @@ async def generate_chronicle_from_history(
     if not history:
         return "기록된 역사가 없습니다."
     
-    # 최근 히스토리만 사용
-    full_text = "\n".join([
-        f"{h['role']}: {h['content']}" 
-        for h in history[-MAX_HISTORY_FOR_CHRONICLE:]
-    ])
+    # 최근 히스토리만 사용 (미리 포맷된 줄 재사용)
+    full_text = domain_manager.get_history_text(channel_id, MAX_HISTORY_FOR_CHRONICLE, history)
     
     system_prompt = (
         "You are the Chronicler. Summarize the provided RPG session log into a compelling narrative summary.\n"
@@ -558,7 +563,7 @@ def export_chronicles_incremental(
     current_len = len(history)
     
     # 모드 결정
-    if mode.lower() in ["전체", "full", "all"]:
+    if mode.lower() in FULL_EXPORT_MODES:
         start_idx = 0
         export_type = "전체(Full)"
     else:
@@ -25,7 +25,7 @@ class SessionManager:
         client: discord.Client,
         domain_manager,
         character_sheet
-    ) -> None:
+    ) -> bool:
         """
         데이터를 리셋하고, 채널을 재생성(Nuke)하여 완벽히 초기화합니다.
         
@@ -34,6 +34,9 @@ class SessionManager:
             client: Discord 클라이언트
             domain_manager: 도메인 매니저 모듈
             character_sheet: 캐릭터 시트 모듈
+        
+        Returns:
+            도메인 데이터가 실제로 초기화되었는지 여부 (취소/시간 초과 시 False)
         """
         channel_id = str(message.channel.id)
         
@@ -45,17 +48,18 @@ class SessionManager:
         )
         await confirm_msg.add_reaction(RESET_CONFIRM_EMOJI)
         
-        def check(reaction, user):
+        # 메시지 캐시 없이도 받을 수 있도록 raw 이벤트로 확인
+        def check(payload: discord.RawReactionActionEvent) -> bool:
             return (
-                user == message.author and
-                str(reaction.emoji) == RESET_CONFIRM_EMOJI and
-                reaction.message.id == confirm_msg.id
+                payload.user_id == message.author.id and
+                str(payload.emoji) == RESET_CONFIRM_EMOJI and
+                payload.message_id == confirm_msg.id
             )
         
         try:
             # 사용자 확인 대기
             await client.wait_for(
-                'reaction_add',
+                'raw_reaction_add',
                 timeout=RESET_CONFIRM_TIMEOUT,
                 check=check
             )
@@ -71,9 +75,11 @@ class SessionManager:
             
             # 3. 채널 재생성 시도
             await self._recreate_channel(message)
+            return True
             
         except asyncio.TimeoutError:
             await self._cancel_reset(confirm_msg, message.channel)
+            return False
     
     async def _recreate_channel(self, message: discord.Message) -> None:
         """채널을 재생성합니다."""
@@ -13,6 +13,7 @@ import domain_manager
 # =========================================================
 DEFAULT_TIME_SLOTS = ["새벽", "오전", "오후", "황혼", "저녁", "심야"]
 DEFAULT_WEATHER_TYPES = ["맑음", "구름 조금", "흐림", "비", "안개", "폭풍우"]
+NIGHT_TIME_SLOTS = frozenset({"황혼", "저녁", "심야"})
 
 # 위기 수치 임계값
 DOOM_THRESHOLD_WARNING = 30
@@ -209,21 +210,25 @@ def _get_doom_description(doom_value: int) -> str:
 # =========================================================
 # 세계 상태 컨텍스트
 # =========================================================
-def get_world_context(channel_id: str) -> str:
+def get_world_context(channel_id: str, domain_data: Optional[Dict[str, Any]] = None) -> str:
     """
     AI에게 전달할 세계 상태 컨텍스트를 생성합니다.
     
     Args:
         channel_id: 채널 ID
+        domain_data: 이미 로드한 도메인 데이터 (없으면 새로 로드)
     
     Returns:
         세계 상태 컨텍스트 문자열
     """
-    world = domain_manager.get_world_state(channel_id)
+    if domain_data is None:
+        domain_data = domain_manager.get_domain(channel_id)
+    
+    world = domain_data.get("world_state", domain_manager.DEFAULT_WORLD_STATE.copy())
     if not world:
         return ""
     
-    party_context = domain_manager.get_party_status_context(channel_id)
+    party_context = domain_manager.get_party_status_context(channel_id, domain_data)
     
     # 기본값 처리
     location = world.get("current_location", "Unknown")
@@ -259,7 +264,7 @@ def get_current_time_info(channel_id: str) -> Dict[str, Any]:
         "day": world.get("day", 1),
         "time_slot": world.get("time_slot", "오후"),
         "weather": world.get("weather", "맑음"),
-        "is_night": world.get("time_slot", "오후") in ["황혼", "저녁", "심야"]
+        "is_night": world.get("time_slot", "오후") in NIGHT_TIME_SLOTS
     }
 
 